@@ -4,12 +4,17 @@ import threading
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs
 import re
+import hashlib
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
 
 import gspread
 from gspread.exceptions import APIError
-from oauth2client.service_account import ServiceAccountCredentials
 import yt_dlp
 
+from planilha import registro_abas, SnapshotAba, estatisticas as estatisticas_sheets
+from metadados import CacheMetadados, extrair_video_id
+
 # ==============================
 # LOG
 # ==============================
@@ -26,18 +31,34 @@ log = logging.getLogger(__name__)
 # ==============================
 # GOOGLE SHEETS
 # ==============================
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-creds = ServiceAccountCredentials.from_json_keyfile_name("creds.json", scope)
-client = gspread.authorize(creds)
-
 SHEET_ID = "*"
 
-ws_pedidos   = client.open_by_key(SHEET_ID).worksheet("Pedidos")
-ws_playlist  = client.open_by_key(SHEET_ID).worksheet("Playlist")
-ws_historico = client.open_by_key(SHEET_ID).worksheet("Historico")
-ws_moderacao = client.open_by_key(SHEET_ID).worksheet("Moderação")
-ws_blacklist = client.open_by_key(SHEET_ID).worksheet("Blacklist")
-ws_horarios  = client.open_by_key(SHEET_ID).worksheet("Horarios")
+# 1 abertura da planilha para todas as abas (metadados em cache no registro)
+abas = registro_abas(SHEET_ID, "creds.json")
+
+ws_pedidos   = abas.aba("Pedidos")
+ws_playlist  = abas.aba("Playlist")
+ws_historico = abas.aba("Historico")
+ws_moderacao = abas.aba("Moderação")
+ws_blacklist = abas.aba("Blacklist")
+ws_horarios  = abas.aba("Horarios")
+
+# Metadados dos vídeos em disco (mesmo arquivo lido pelo main.py antes de baixar)
+cache_metadados = CacheMetadados()
+
+# Blacklist: confere o conteúdo no máximo a cada X seg (antes, se o nº de linhas da aba mudar)
+INTERVALO_BLACKLIST = 300
+
+# Regras de recusa: aba opcional com pares Chave | Valor (max_nome, max_mensagem, padrao_link, ordem_regras)
+ABA_CONFIG = "Config"
+INTERVALO_CONFIG = 300
+
+# Polling dos workers: volta ao mínimo quando há atividade e dobra a cada ciclo ocioso até o máximo
+POLL_MINIMO = 10    # seg
+POLL_MAXIMO = 600   # seg
+
+# Máximo de extract_info simultâneos ao validar pedidos (respeita o limite do YouTube)
+MAX_VALIDACOES_PARALELAS = 4
 
 # Convenções de colunas (1-based):
 # 1: ? (timestamp ou id), 2: Email, 3: Nome, 4: Mensagem, 5: Link, 6: Status, 7: Status Mensagem
@@ -46,25 +67,175 @@ ws_horarios  = client.open_by_key(SHEET_ID).worksheet("Horarios")
 # ==============================
 # UTIL
 # ==============================
+PADRAO_LINK = r"(https?://|www\.|\.[a-z]{2,})"
+_re_link = re.compile(PADRAO_LINK, re.IGNORECASE)
+
 def contem_link(texto: str) -> bool:
     if not texto:
         return False
-    padrao = re.compile(r"(https?://|www\.|\.[a-z]{2,})", re.IGNORECASE)
-    return bool(padrao.search(texto))
+    return bool(_re_link.search(texto))
+
+# Recusas da API ao apagar linhas de aba ligada a formulário (ou protegida): aí limpa em vez de apagar
+_re_erro_formulario = re.compile(
+    r"Cannot delete row with form questions|Invalid requests\[\d+\]\.deleteDimension|protected cell or object",
+    re.IGNORECASE)
+
+def _eh_erro_formulario(e: APIError) -> bool:
+    resp = getattr(e, "response", None)
+    if getattr(resp, "status_code", None) not in (400, 403):
+        return False  # cota (429), 5xx etc.: não é recusa do formulário
+    return bool(_re_erro_formulario.search(str(e)))
+
+def _intervalos_contiguos(indices):
+    """Agrupa índices (1-based) em faixas contíguas, de baixo pra cima: [(inicio, fim), ...]."""
+    faixas = []
+    for idx in sorted(set(indices), reverse=True):
+        if faixas and faixas[-1][0] == idx + 1:
+            faixas[-1] = (idx, faixas[-1][1])
+        else:
+            faixas.append((idx, idx))
+    return faixas
 
-def safe_delete_row(ws, idx, cols=7, planilha_nome=""):
-    """Tenta deletar a linha. Se for planilha de Form (erro 400), 'limpa' a linha."""
+class LoteEscrita:
+    """
+    Acumula as movimentações de um ciclo e aplica tudo de uma vez:
+    - 1 append_rows por aba de destino;
+    - 1 batch_update (deleteDimension) por aba de origem.
+    Se a aba de origem não permitir deletar (ex.: aba de formulário),
+    as linhas são limpas com 1 batch_clear.
+    """
+    def __init__(self):
+        self.inserir = {}  # ws.id -> (ws, [linhas])
+        self.apagar  = {}  # ws.id -> (ws, set(idx), cols, nome)
+        self.limpas  = set()
+
+    def adicionar(self, ws, row):
+        self.inserir.setdefault(ws.id, (ws, []))[1].append(row)
+
+    def remover(self, ws, idx, cols=7, planilha_nome=""):
+        self.apagar.setdefault(ws.id, (ws, set(), cols, planilha_nome))[1].add(idx)
+
+    def aplicar(self):
+        """
+        Primeiro grava nos destinos; só depois apaga da origem (se a escrita falhar, nada se perde).
+        Devolve {ws.id: resposta do append_rows}. Em 'limpas' ficam os ws.id que foram limpos em vez de deletados.
+        """
+        respostas = {}
+        self.limpas = set()
+        try:
+            for ws, linhas in self.inserir.values():
+                if linhas:
+                    respostas[ws.id] = ws.append_rows(linhas, value_input_option="USER_ENTERED")
+            for ws, indices, cols, nome in self.apagar.values():
+                if indices and not self._apagar_linhas(ws, indices, cols, nome):
+                    self.limpas.add(ws.id)
+        finally:
+            if self.inserir or self.apagar:
+                abas.invalidar()  # nº de linhas mudou (mesmo que só parte tenha sido gravada)
+            self.inserir.clear()
+            self.apagar.clear()
+        return respostas
+
+    @staticmethod
+    def _apagar_linhas(ws, indices, cols, nome):
+        """Devolve True se deletou; False se teve que limpar as linhas."""
+        faixas = _intervalos_contiguos(indices)
+        requests = [{
+            "deleteDimension": {
+                "range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": ini - 1, "endIndex": fim}
+            }
+        } for ini, fim in faixas]
+        try:
+            ws.spreadsheet.batch_update({"requests": requests})
+            return True
+        except APIError as e:
+            if not _eh_erro_formulario(e):
+                raise
+            # limpa as linhas inteiras (mantém estrutura do Form)
+            col_fim = chr(ord('A') + cols - 1)
+            ws.batch_clear([f"A{ini}:{col_fim}{fim}" for ini, fim in faixas])
+            log.info(f"[{nome}] {len(indices)} linha(s) limpa(s) (não deletadas por ser aba de formulário).")
+            return False
+
+_re_intervalo = re.compile(r"![A-Z]+(\d+)(?::[A-Z]+(\d+))?$")
+
+def _linhas_do_intervalo(resposta):
+    """Resposta de append_row(s) -> (linha_inicial, linha_final) do updatedRange, ou None."""
     try:
-        ws.delete_rows(idx)
-    except APIError as e:
-        msg = str(e)
-        if "Cannot delete row with form questions" in msg or "Invalid requests[0].deleteDimension" in msg:
-            # limpa a linha inteira (mantém estrutura do Form)
-            rng = f"A{idx}:{chr(ord('A')+cols-1)}{idx}"
-            ws.update(rng, [ [""]*cols ])
-            log.info(f"[{planilha_nome}] Linha {idx} limpa (não deletada por ser aba de formulário).")
-        else:
-            raise
+        m = _re_intervalo.search(resposta["updates"]["updatedRange"])
+        return int(m.group(1)), int(m.group(2) or m.group(1))
+    except Exception:
+        return None
+
+# ==============================
+# BLACKLIST
+# ==============================
+class IndiceBlacklist:
+    """
+    Blacklist indexada (coluna A da aba Blacklist, sem cabeçalho):
+    - 'aluno@escola.com'  -> e-mail exato (set);
+    - '@escola.com'       -> domínio inteiro, incluindo subdomínios (set);
+    - 'aluno*@escola.com' -> curinga (* e ?), todos compilados numa única regex.
+    Só relê a coluna quando a planilha mudou (última alteração do Drive, já consultada pelo ciclo)
+    e só reconstrói o índice quando o conteúdo mudou (nº de entradas + hash).
+    """
+    def __init__(self, ws, nome_aba="Blacklist", intervalo=INTERVALO_BLACKLIST):
+        self.ws = ws
+        self.nome_aba = nome_aba
+        self.intervalo = intervalo
+        self.emails = set()
+        self.dominios = set()
+        self.curingas = None      # regex única ou None
+        self._assinatura = None   # (nº de entradas, sha1)
+        self._alteracao = None    # última alteração da planilha na leitura anterior
+        self._conferido_em = 0.0
+
+    def atualizar(self):
+        """Relê a aba se necessário. Devolve True se o índice foi reconstruído."""
+        alteracao = abas.ultima_alteracao()  # None = não deu para consultar: relê sempre
+        if (self._assinatura is not None and alteracao is not None and alteracao == self._alteracao
+                and time.time() - self._conferido_em < self.intervalo):
+            return False
+
+        valores = self.ws.col_values(1)[1:]  # só a coluna A (pula cabeçalho)
+        self._alteracao = alteracao
+        self._conferido_em = time.time()
+        assinatura = (len(valores), hashlib.sha1("\n".join(valores).encode("utf-8")).hexdigest())
+        if assinatura == self._assinatura:
+            return False
+
+        emails, dominios, padroes = set(), set(), []
+        for v in valores:
+            v = (v or "").strip().lower()
+            if not v:
+                continue
+            if "*" in v or "?" in v:
+                padroes.append(fnmatch.translate(v))
+            elif v.startswith("@"):
+                dominios.add(v[1:])
+            else:
+                emails.add(v)
+        self.emails, self.dominios = emails, dominios
+        self.curingas = re.compile("|".join(padroes)) if padroes else None
+        self._assinatura = assinatura
+        log.info(f"[Blacklist] Índice atualizado: {len(emails)} e-mails, {len(dominios)} domínios, {len(padroes)} curingas.")
+        return True
+
+    def contem(self, email: str) -> bool:
+        email = (email or "").strip().lower()
+        if not email:
+            return False
+        if email in self.emails:
+            return True
+        if self.dominios and "@" in email:
+            # testa o domínio e os "pais" (turma.escola.com -> escola.com)
+            partes = email.rsplit("@", 1)[1].split(".")
+            for k in range(len(partes) - 1):
+                if ".".join(partes[k:]) in self.dominios:
+                    return True
+        return bool(self.curingas and self.curingas.match(email))
+
+blacklist = IndiceBlacklist(ws_blacklist)
 
 # ==============================
 # VALIDAÇÃO DE LINKS
@@ -78,7 +249,7 @@ def eh_link_youtube(url: str) -> bool:
         return False
 
 def _parece_video_youtube(url: str) -> (bool, str):
-    """Heurística rápida: aceita watch?v=, youtu.be/<id>, /shorts/<id>, /live/<id>. Recusa se tiver list=."""
+    """Heurística rápida: aceita watch?v=, youtu.be/<id>, /shorts/<id>, /live/<id> (ver extrair_video_id). Recusa se tiver list=."""
     try:
         p = urlparse(url)
         q = parse_qs(p.query)
@@ -87,45 +258,38 @@ def _parece_video_youtube(url: str) -> (bool, str):
         if "list" in q or "playlist" in path:
             return False, "Link é playlist"
 
-        if "youtu.be" in p.netloc.lower():
-            # youtu.be/<id>
-            return (len(path.strip("/")) > 0, "Formato de link inválido" if len(path.strip("/")) == 0 else "OK")
-
-        if "/watch" in path and "v" in q and q["v"][0].strip():
-            return True, "OK"
-
-        if path.startswith("/shorts/") and len(path.split("/")) >= 3 and path.split("/")[2].strip():
-            return True, "OK"
-
-        if path.startswith("/live/") and len(path.split("/")) >= 3 and path.split("/")[2].strip():
+        if extrair_video_id(url):
             return True, "OK"
 
         return False, "Formato de link inválido"
     except Exception:
         return False, "Formato de link inválido"
 
-def validar_link_youtube(url: str):
-    """
-    Camada 1: heurística rápida (domínio + formato + sem playlist).
-    Camada 2: yt_dlp para confirmar (recusa +18 e qualquer playlist/multivídeo).
-    """
+def validar_formato_youtube(url: str):
+    """Camada 1 (sem rede): domínio + formato + sem playlist."""
     if not eh_link_youtube(url):
         return False, "Link não é do YouTube"
+    return _parece_video_youtube(url)
 
-    ok_formato, motivo_formato = _parece_video_youtube(url)
-    if not ok_formato:
-        return False, motivo_formato
-
+def confirmar_video_youtube(url: str):
+    """
+    Camada 2: yt_dlp para confirmar (recusa +18 e qualquer playlist/multivídeo).
+    Consulta antes o cache de metadados; só vai à rede se o vídeo não estiver lá.
+    """
     try:
-        ydl_opts = {
-            "quiet": True,
-            "skip_download": True,
-            "socket_timeout": 10,
-            "nocheckcertificate": True,
-            "geo_bypass": True,
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+        video_id = extrair_video_id(url)
+        info = cache_metadados.obter(video_id)
+        if info is None:
+            ydl_opts = {
+                "quiet": True,
+                "skip_download": True,
+                "socket_timeout": 10,
+                "nocheckcertificate": True,
+                "geo_bypass": True,
+            }
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+            cache_metadados.salvar(video_id, info)
 
         # Recusa conteúdo adulto
         if info.get("age_limit", 0) >= 18:
@@ -140,10 +304,167 @@ def validar_link_youtube(url: str):
     except Exception as e:
         return False, f"Erro ao validar link: {e}"
 
+def validar_link_youtube(url: str):
+    """
+    Camada 1: heurística rápida (domínio + formato + sem playlist).
+    Camada 2: yt_dlp para confirmar (recusa +18 e qualquer playlist/multivídeo).
+    """
+    ok_formato, motivo_formato = validar_formato_youtube(url)
+    if not ok_formato:
+        return False, motivo_formato
+    return confirmar_video_youtube(url)
+
+def confirmar_videos_em_paralelo(links):
+    """
+    Roda a camada 2 para vários links ao mesmo tempo, limitado a MAX_VALIDACOES_PARALELAS
+    (para não estourar o limite do YouTube). Devolve {link: (ok, motivo)}.
+    """
+    unicos = list(dict.fromkeys(links))
+    if not unicos:
+        return {}
+    workers = max(1, min(MAX_VALIDACOES_PARALELAS, len(unicos)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ValidaYT") as pool:
+        return dict(zip(unicos, pool.map(confirmar_video_youtube, unicos)))
+
+# ==============================
+# REGRAS DE RECUSA
+# ==============================
+CONFIG_PADRAO = {
+    "max_nome": 32,
+    "max_mensagem": 72,
+    "padrao_link": PADRAO_LINK,
+    "ordem_regras": "",
+}
+
+class Regra:
+    """
+    Uma regra de recusa. teste(pedido, cfg) -> motivo (str) ou None se passou.
+    Regras de rede (rede=True) recebem a lista de pedidos de uma vez: teste(pedidos, cfg) -> [motivo|None].
+    """
+    def __init__(self, nome, teste, custo=1, rede=False):
+        self.nome = nome
+        self.teste = teste
+        self.custo = custo
+        self.rede = rede
+        self.avaliacoes = 0
+        self.recusas = 0
+        self.tempo = 0.0  # seg acumulados
+
+def _regra_tamanho(campo, chave, motivo):
+    return lambda p, cfg: motivo if len(p[campo]) > cfg[chave] else None
+
+def _regra_link(campo, motivo):
+    return lambda p, cfg: motivo if p[campo] and cfg["re_link"].search(p[campo]) else None
+
+def _regra_formato(p, cfg):
+    ok, motivo = validar_formato_youtube(p["link"])
+    return None if ok else motivo
+
+def _regra_youtube(pedidos, cfg):
+    confirmados = confirmar_videos_em_paralelo([p["link"] for p in pedidos])
+    return [None if confirmados[p["link"]][0] else confirmados[p["link"]][1] for p in pedidos]
+
+class MotorRegras:
+    """
+    Avalia um lote de pedidos em uma passada:
+    - regras locais em ordem de custo (ou 'ordem_regras' da aba Config), parando na 1ª recusa;
+    - só os pedidos que passaram em tudo chegam às regras de rede (em paralelo).
+    Guarda, por regra, avaliações, recusas e tempo gasto.
+    """
+    def __init__(self, regras):
+        self.regras = regras
+        self.cfg = {}
+        self._config_lida_em = 0.0
+        self.configurar({})
+
+    def configurar(self, valores):
+        cfg = dict(CONFIG_PADRAO)
+        for chave, padrao in CONFIG_PADRAO.items():
+            v = (valores.get(chave) or "").strip()
+            if not v:
+                continue
+            try:
+                cfg[chave] = int(v) if isinstance(padrao, int) else v
+            except ValueError:
+                log.warning(f"[Regras] Valor inválido para '{chave}': {v!r}. Usando {padrao!r}.")
+        try:
+            cfg["re_link"] = re.compile(cfg["padrao_link"], re.IGNORECASE)
+        except re.error as e:
+            log.warning(f"[Regras] padrao_link inválido ({e}). Usando o padrão.")
+            cfg["re_link"] = _re_link
+
+        ordem = [n.strip() for n in cfg["ordem_regras"].split(",") if n.strip()]
+        posicao = {n: k for k, n in enumerate(ordem)}
+        # rede sempre por último; depois ordem configurada; depois custo
+        self.regras.sort(key=lambda r: (r.rede, posicao.get(r.nome, len(ordem)), r.custo))
+        self.cfg = cfg
+
+    def carregar_config(self):
+        """Relê a aba Config (se existir) no máximo a cada INTERVALO_CONFIG."""
+        if time.time() - self._config_lida_em < INTERVALO_CONFIG:
+            return
+        self._config_lida_em = time.time()
+        try:
+            rows = abas.aba(ABA_CONFIG).get_all_values()[1:]  # pula cabeçalho
+        except gspread.exceptions.WorksheetNotFound:
+            rows = []
+        except Exception as e:
+            log.warning(f"[Regras] Erro ao ler aba {ABA_CONFIG}: {e}. Mantendo configuração atual.")
+            return
+        self.configurar({r[0].strip().lower(): r[1] for r in rows if len(r) >= 2 and r[0].strip()})
+
+    def _rodar(self, regra, arg):
+        t = time.perf_counter()
+        try:
+            return regra.teste(arg, self.cfg)
+        finally:
+            regra.tempo += time.perf_counter() - t
+
+    def avaliar_lote(self, pedidos):
+        """pedidos: [{'email', 'nome', 'msg', 'link'}] -> [motivo da recusa ou None], na mesma ordem."""
+        motivos = [None] * len(pedidos)
+        for k, p in enumerate(pedidos):
+            for regra in self.regras:
+                if regra.rede:
+                    break
+                regra.avaliacoes += 1
+                motivo = self._rodar(regra, p)
+                if motivo:
+                    regra.recusas += 1
+                    motivos[k] = motivo
+                    break
+
+        for regra in (r for r in self.regras if r.rede):
+            pendentes = [k for k, m in enumerate(motivos) if m is None]
+            if not pendentes:
+                break
+            regra.avaliacoes += len(pendentes)
+            for k, motivo in zip(pendentes, self._rodar(regra, [pedidos[k] for k in pendentes])):
+                if motivo:
+                    regra.recusas += 1
+                    motivos[k] = motivo
+        return motivos
+
+    def estatisticas(self):
+        return [(r.nome, r.avaliacoes, r.recusas, r.tempo) for r in self.regras]
+
+    def resumo(self):
+        return " | ".join(f"{nome}: {rec}/{aval} em {tempo * 1000:.1f} ms" for nome, aval, rec, tempo in self.estatisticas())
+
+motor_regras = MotorRegras([
+    Regra("blacklist",     lambda p, cfg: "Email em blacklist" if blacklist.contem(p["email"]) else None, custo=1),
+    Regra("tamanho_nome",  _regra_tamanho("nome", "max_nome", "Nome muito grande"), custo=1),
+    Regra("tamanho_msg",   _regra_tamanho("msg", "max_mensagem", "Mensagem muito grande"), custo=1),
+    Regra("link_nome",     _regra_link("nome", "Nome contém link"), custo=2),
+    Regra("link_msg",      _regra_link("msg", "Mensagem contém link"), custo=2),
+    Regra("formato_link",  _regra_formato, custo=3),
+    Regra("youtube",       _regra_youtube, custo=100, rede=True),
+])
+
 # ==============================
 # MOVIMENTAÇÃO ENTRE ABAS
 # ==============================
-def mover_para_historico_com_recusa(row_original, motivo):
+def mover_para_historico_com_recusa(lote, row_original, motivo):
     """
     Garante 8 colunas na escrita do Histórico e ajusta:
     - Status (col 6) = 'Recusado'
@@ -154,31 +475,86 @@ def mover_para_historico_com_recusa(row_original, motivo):
     base[5] = "Recusado"  # Status
     base[6] = ""          # Status Msg
     historico = base + [f"Recusado pelo Robo: {motivo}"]  # Observação
-    ws_historico.append_row(historico, value_input_option="USER_ENTERED")
+    lote.adicionar(ws_historico, historico)
     log.info(f"[Historico] Recusado -> Nome='{base[2]}' Link='{base[4]}' | {motivo}")
 
-def mover_para_moderacao(row):
+def mover_para_moderacao(lote, row):
     row = (row + [""] * (7 - len(row)))[:7]
     row[5] = "Aguardando Aprovação"  # Status
-    ws_moderacao.append_row(row, value_input_option="USER_ENTERED")
+    lote.adicionar(ws_moderacao, row)
     log.info(f"[Moderação] Enviado -> Nome='{row[2]}' Link='{row[4]}'")
 
-def mover_para_playlist(row):
-    ws_playlist.append_row(row, value_input_option="USER_ENTERED")
+def mover_para_playlist(lote, row):
+    lote.adicionar(ws_playlist, row)
     log.info(f"[Playlist] Adicionado -> Nome='{row[2]}' Link='{row[4]}'")
 
-    # Garante linha vazia no final
-    valores = ws_playlist.get_all_values()
-    if valores and any(c.strip() for c in valores[-1]):
-        ws_playlist.append_row([""] * 7, value_input_option="USER_ENTERED")
+class CaudaPlaylist:
+    """
+    Fim da aba Playlist mantido em memória, para não reler a aba inteira a cada música:
+    - ultima_linha: última linha com conteúdo (None = desconhecida);
+    - tem_linha_vazia: se a linha 100% vazia do final já existe.
+    As respostas dos appends confirmam a posição; a aba só é relida quando
+    um append cai num intervalo diferente do esperado (alguém mexeu na aba).
+    """
+    def __init__(self, ws):
+        self.ws = ws
+        self.ultima_linha = None
+        self.tem_linha_vazia = False
+        self._lock = threading.Lock()
+
+    def sincronizar(self, rows=None):
+        """Recalcula o estado a partir do conteúdo da aba (lido agora, se não for passado)."""
+        if rows is None:
+            rows = self.ws.get_all_values()
+        with self._lock:
+            self.ultima_linha = len(rows)
+            self.tem_linha_vazia = bool(rows) and not any((c or "").strip() for c in rows[-1])
+
+    def invalidar(self):
+        with self._lock:
+            self.ultima_linha = None
+
+    def registrar_insercao(self, resposta):
+        """Atualiza o fim da aba a partir da resposta do append_rows."""
+        intervalo = _linhas_do_intervalo(resposta)
+        with self._lock:
+            if not intervalo or (self.ultima_linha is not None and intervalo[0] != self.ultima_linha + 1):
+                log.info(f"[Playlist] Append fora do intervalo esperado ({intervalo}). Fim da aba será relido.")
+                self.ultima_linha = None
+                return
+            self.ultima_linha = intervalo[1]
+            self.tem_linha_vazia = False
+
+    def registrar_remocao(self, qtd):
+        """Linhas (acima do fim) deletadas: o fim sobe junto."""
+        with self._lock:
+            if self.ultima_linha is not None:
+                self.ultima_linha = max(0, self.ultima_linha - qtd)
+
+    def garantir_linha_vazia(self):
+        if self.ultima_linha is None:
+            self.sincronizar()
+        if self.tem_linha_vazia:
+            return
+        resposta = self.ws.append_row([""] * 7, value_input_option="USER_ENTERED")
+        intervalo = _linhas_do_intervalo(resposta)
+        with self._lock:
+            if intervalo and self.ultima_linha is not None and intervalo[0] == self.ultima_linha + 1:
+                self.tem_linha_vazia = True
+            else:
+                self.ultima_linha = None
         log.info("[Playlist] Linha vazia adicionada no final.")
 
+cauda_playlist = CaudaPlaylist(ws_playlist)
+
 # ==============================
 # HORÁRIOS / LIMPEZA PLAYLIST
 # ==============================
-def horario_ativo():
+def horario_ativo(rows=None):
     try:
-        rows = ws_horarios.get_all_values()[1:]  # pula cabeçalho
+        if rows is None:
+            rows = ws_horarios.get_all_values()
+        rows = rows[1:]  # pula cabeçalho
         agora = datetime.now().time()
         for r in rows:
             if len(r) < 3:
@@ -200,118 +576,97 @@ def horario_ativo():
         log.error(f"[Horarios] Erro: {e}")
         return True  # fallback seguro
 
-def mover_playlist_para_historico_quando_fora_do_horario():
+def mover_playlist_para_historico_quando_fora_do_horario(rows=None):
     """
     Move APENAS linhas com Status == 'Tocado'/'Tocada' para o Histórico.
     Mantém (ou cria) uma linha 100% vazia no final da Playlist.
+    Devolve quantas músicas foram movidas.
     """
-    try:
+    if rows is None:
         rows = ws_playlist.get_all_values()
-        if len(rows) <= 1:
-            return
+    cauda_playlist.sincronizar(rows)
+    if len(rows) <= 1:
+        return 0
 
-        corpo = rows[1:]  # sem cabeçalho
-        linhas_para_apagar = []
+    corpo = rows[1:]  # sem cabeçalho
+    lote = LoteEscrita()
+    movidas = 0
 
-        for idx_excel, r in enumerate(corpo, start=2):  # 2 = porque linha 1 é cabeçalho
-            status = (r[5].strip().lower() if len(r) > 5 else "")
-            if status in ("tocado", "tocada"):
-                base = (r + [""] * (7 - len(r)))[:7]
-                historico = base + ["Encerrado pelo horário"]
-                ws_historico.append_row(historico, value_input_option="USER_ENTERED")
-                linhas_para_apagar.append(idx_excel)
+    for idx_excel, r in enumerate(corpo, start=2):  # 2 = porque linha 1 é cabeçalho
+        status = (r[5].strip().lower() if len(r) > 5 else "")
+        if status in ("tocado", "tocada"):
+            base = (r + [""] * (7 - len(r)))[:7]
+            lote.adicionar(ws_historico, base + ["Encerrado pelo horário"])
+            lote.remover(ws_playlist, idx_excel, cols=7, planilha_nome="Playlist")
+            movidas += 1
 
-        if not linhas_para_apagar:
-            return
+    if not movidas:
+        return 0
 
-        # Apaga de baixo pra cima
-        for idx in reversed(linhas_para_apagar):
-            try:
-                ws_playlist.delete_rows(idx)
-            except APIError as e:
-                # Playlist normalmente não é formulário; se falhar, limpamos a linha
-                rng = f"A{idx}:G{idx}"
-                ws_playlist.update(rng, [[""] * 7])
-
-        # Garante linha vazia final
-        valores = ws_playlist.get_all_values()
-        if not valores or any(c.strip() for c in valores[-1]):
-            ws_playlist.append_row([""] * 7, value_input_option="USER_ENTERED")
-
-        log.info(f"[Playlist] Movidas {len(linhas_para_apagar)} músicas 'Tocado' para histórico (fim do horário).")
-    except Exception as e:
-        log.error(f"[Playlist] Erro mover -> {e}")
+    lote.aplicar()
+    if ws_playlist.id in lote.limpas:
+        cauda_playlist.invalidar()
+    else:
+        cauda_playlist.registrar_remocao(movidas)
+
+    # Garante linha vazia final
+    cauda_playlist.garantir_linha_vazia()
+
+    log.info(f"[Playlist] Movidas {movidas} músicas 'Tocado' para histórico (fim do horário).")
+    return movidas
 
 # ==============================
 # PROCESSOS
 # ==============================
-def processar_pedidos():
-    rows = ws_pedidos.get_all_values()
-    # blacklist (pula cabeçalho)
-    blacklist = [r[0].strip().lower() for r in ws_blacklist.get_all_values()[1:] if r and r[0].strip()]
-
-    aceitos, recusados = 0, 0
-
-    for i in range(len(rows), 1, -1):  # de baixo pra cima
+def processar_pedidos(rows=None):
+    """Processa a aba Pedidos (rows = conteúdo já lido, se houver). Devolve quantos pedidos saíram da aba."""
+    if rows is None:
+        rows = ws_pedidos.get_all_values()
+    blacklist.atualizar()
+    motor_regras.carregar_config()
+
+    linhas, pedidos = [], []  # de baixo pra cima
+    for i in range(len(rows), 1, -1):
         row = rows[i-1]
         if not any((c or "").strip() for c in row):
             continue
-
-        email = (row[1] if len(row) > 1 else "").strip().lower()
-        nome  = (row[2] if len(row) > 2 else "").strip()
-        msg   = (row[3] if len(row) > 3 else "").strip()
-        link  = (row[4] if len(row) > 4 else "").strip()
-
-        # 1) Blacklist
-        if email in blacklist:
-            mover_para_historico_com_recusa(row, "Email em blacklist")
-            safe_delete_row(ws_pedidos, i, cols=7, planilha_nome="Pedidos")
-            recusados += 1
-            continue
-
-        # 2) Nome/Mensagem com links
-        if contem_link(nome):
-            mover_para_historico_com_recusa(row, "Nome contém link")
-            safe_delete_row(ws_pedidos, i, cols=7, planilha_nome="Pedidos")
-            recusados += 1
-            continue
-
-        if contem_link(msg):
-            mover_para_historico_com_recusa(row, "Mensagem contém link")
-            safe_delete_row(ws_pedidos, i, cols=7, planilha_nome="Pedidos")
-            recusados += 1
-            continue
-
-        # 3) Tamanho
-        if len(nome) > 32:
-            mover_para_historico_com_recusa(row, "Nome muito grande")
-            safe_delete_row(ws_pedidos, i, cols=7, planilha_nome="Pedidos")
-            recusados += 1
-            continue
-
-        if len(msg) > 72:
-            mover_para_historico_com_recusa(row, "Mensagem muito grande")
-            safe_delete_row(ws_pedidos, i, cols=7, planilha_nome="Pedidos")
-            recusados += 1
-            continue
-
-        # 4) Link YouTube
-        ok, motivo = validar_link_youtube(link)
-        if not ok:
-            mover_para_historico_com_recusa(row, motivo)
-            safe_delete_row(ws_pedidos, i, cols=7, planilha_nome="Pedidos")
+        linhas.append((i, row))
+        pedidos.append({
+            "email": (row[1] if len(row) > 1 else "").strip().lower(),
+            "nome":  (row[2] if len(row) > 2 else "").strip(),
+            "msg":   (row[3] if len(row) > 3 else "").strip(),
+            "link":  (row[4] if len(row) > 4 else "").strip(),
+        })
+
+    if not pedidos:
+        log.info("[Pedidos] Aceitos=0 | Recusados=0")
+        return 0
+
+    # Regras baratas primeiro; só os que passarem vão para a validação de rede (em paralelo)
+    motivos = motor_regras.avaliar_lote(pedidos)
+
+    # Escritas na ordem das linhas
+    lote = LoteEscrita()
+    aceitos, recusados = 0, 0
+    for (i, row), motivo in zip(linhas, motivos):
+        if motivo:
+            mover_para_historico_com_recusa(lote, row, motivo)
             recusados += 1
-            continue
-
-        # 5) Envia pra moderação
-        mover_para_moderacao((row + [""] * (7 - len(row)))[:7])
-        safe_delete_row(ws_pedidos, i, cols=7, planilha_nome="Pedidos")
-        aceitos += 1
+        else:
+            mover_para_moderacao(lote, (row + [""] * (7 - len(row)))[:7])
+            aceitos += 1
+        lote.remover(ws_pedidos, i, cols=7, planilha_nome="Pedidos")
 
+    lote.aplicar()
     log.info(f"[Pedidos] Aceitos={aceitos} | Recusados={recusados}")
-
-def processar_moderacao():
-    rows = ws_moderacao.get_all_values()
+    log.info(f"[Regras] Recusas/avaliações: {motor_regras.resumo()}")
+    return aceitos + recusados
+
+def processar_moderacao(rows=None):
+    """Processa a aba Moderação (rows = conteúdo já lido, se houver). Devolve quantos pedidos saíram da aba."""
+    if rows is None:
+        rows = ws_moderacao.get_all_values()
+    lote = LoteEscrita()
     aceitos, recusados = 0, 0
 
     for i in range(len(rows), 1, -1):  # de baixo pra cima
@@ -324,53 +679,91 @@ def processar_moderacao():
 
         if status == "recusado":
             base = (row + [""] * (7 - len(row)))[:7]
-            historico = base + ["Recusado pelo Moderador"]
-            ws_historico.append_row(historico, value_input_option="USER_ENTERED")
-            try:
-                ws_moderacao.delete_rows(i)
-            except APIError:
-                rng = f"A{i}:G{i}"
-                ws_moderacao.update(rng, [[""] * 7])
+            lote.adicionar(ws_historico, base + ["Recusado pelo Moderador"])
+            lote.remover(ws_moderacao, i, cols=7, planilha_nome="Moderação")
             recusados += 1
 
         elif status == "aceito" and status_msg:
-            mover_para_playlist((row + [""] * (7 - len(row)))[:7])
-            try:
-                ws_moderacao.delete_rows(i)
-            except APIError:
-                rng = f"A{i}:G{i}"
-                ws_moderacao.update(rng, [[""] * 7])
+            mover_para_playlist(lote, (row + [""] * (7 - len(row)))[:7])
+            lote.remover(ws_moderacao, i, cols=7, planilha_nome="Moderação")
             aceitos += 1
 
+    respostas = lote.aplicar()
+    if aceitos:
+        cauda_playlist.registrar_insercao(respostas.get(ws_playlist.id))
+        # Garante linha vazia no final (1x por ciclo, sem reler a aba)
+        cauda_playlist.garantir_linha_vazia()
+
     log.info(f"[Moderação] Aceitos={aceitos} | Recusados={recusados}")
+    return aceitos + recusados
 
 # ==============================
-# WORKERS
+# WORKERS (detecção de mudança + polling adaptativo)
 # ==============================
-def worker_pedidos():
+snap_pedidos   = SnapshotAba(abas, "Pedidos")
+snap_moderacao = SnapshotAba(abas, "Moderação")
+snap_playlist  = SnapshotAba(abas, "Playlist")
+snap_horarios  = SnapshotAba(abas, "Horarios")
+
+class AgendadorAdaptativo:
+    """Intervalo entre ciclos: volta ao mínimo quando há atividade; multiplica por 'fator' a cada ciclo ocioso."""
+    def __init__(self, minimo=POLL_MINIMO, maximo=POLL_MAXIMO, fator=2.0):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.fator = fator
+        self.intervalo = minimo
+
+    def proximo(self, houve_atividade):
+        if houve_atividade:
+            self.intervalo = self.minimo
+        else:
+            self.intervalo = min(self.maximo, self.intervalo * self.fator)
+        return self.intervalo
+
+def _processar_se_mudou(snap, processar):
+    """
+    Só baixa/processa a aba se ela mudou. Devolve True se houve atividade: linhas processadas ou movidas
+    (a releitura da aba logo depois da nossa própria escrita, sem nada a fazer, não conta).
+    """
+    if not snap.atualizar():
+        return False
+    try:
+        feitas = processar(snap.linhas)
+    except Exception:
+        snap.invalidar()  # tenta de novo no próximo ciclo
+        raise
+    return bool(feitas)
+
+def ciclo_pedidos():
+    return _processar_se_mudou(snap_pedidos, processar_pedidos)
+
+def ciclo_moderacao():
+    return _processar_se_mudou(snap_moderacao, processar_moderacao)
+
+def ciclo_horarios():
+    snap_horarios.atualizar()
+    if horario_ativo(snap_horarios.linhas):
+        return False
+    return _processar_se_mudou(snap_playlist, mover_playlist_para_historico_quando_fora_do_horario)
+
+def _rodar_worker(nome, ciclo, agendador):
     while True:
+        ativo = False
         try:
-            processar_pedidos()
+            ativo = ciclo()
         except Exception as e:
-            log.error(f"[Worker Pedidos] Erro: {e}")
-        time.sleep(60)
+            log.error(f"[Worker {nome}] Erro: {e}")
+        time.sleep(agendador.proximo(ativo))
+
+def worker_pedidos():
+    _rodar_worker("Pedidos", ciclo_pedidos, AgendadorAdaptativo())
 
 def worker_moderacao():
-    while True:
-        try:
-            processar_moderacao()
-        except Exception as e:
-            log.error(f"[Worker Moderacao] Erro: {e}")
-        time.sleep(60)
+    _rodar_worker("Moderacao", ciclo_moderacao, AgendadorAdaptativo())
 
 def worker_horarios():
-    while True:
-        try:
-            if not horario_ativo():
-                mover_playlist_para_historico_quando_fora_do_horario()
-        except Exception as e:
-            log.error(f"[Worker Horarios] Erro: {e}")
-        time.sleep(60)
+    # depende do relógio: nunca espera mais que alguns minutos
+    _rodar_worker("Horarios", ciclo_horarios, AgendadorAdaptativo(minimo=60, maximo=300))
 
 # ==============================
 # MAIN
@@ -381,6 +774,7 @@ if __name__ == "__main__":
     threading.Thread(target=worker_moderacao, daemon=True, name="T-Moderacao").start()
     threading.Thread(target=worker_horarios,  daemon=True, name="T-Horarios").start()
 
-    # Mantém vivo
+    # Mantém vivo (e registra os contadores do limitador do Sheets a cada 10 min)
     while True:
-        time.sleep(1)
+        time.sleep(600)
+        log.info(f"[GSHEETS] Limitador: {estatisticas_sheets()}")
@@ -0,0 +1,229 @@
+"""
+Benchmark de chamadas ao Google Sheets por ciclo, usando a planilha em memória.
+
+Mede, para planilhas sintéticas de 10, 1k e 10k linhas:
+  - processar_pedidos / processar_moderacao / mover_playlist_para_historico_quando_fora_do_horario (back.py)
+  - ciclo_pedidos sem nenhuma mudança na planilha (back.py)
+  - ler_novas_musicas, o ciclo do buscar_novas_musicas_worker (main.py)
+e mostra chamadas, bytes e tempo por ciclo.
+
+Uso (na raiz do projeto):
+    python bench/bench_ciclos.py
+    python bench/bench_ciclos.py --tamanhos 10,1000 --latencia 0.05
+    python bench/bench_ciclos.py --max-chamadas 10   # sai com erro se algum ciclo passar disso
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import importlib
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import planilha
+from planilha_fake import PlanilhaFake, ClienteFake
+
+CABECALHO = ["Carimbo", "Email", "Nome", "Mensagem", "Link", "Status", "Status Mensagem"]
+
+# ==============================
+# DADOS SINTÉTICOS
+# ==============================
+def _link(i):
+    return f"https://www.youtube.com/watch?v={i:011d}"
+
+def gerar_pedidos(n):
+    rows = [CABECALHO]
+    for i in range(n):
+        email, nome, msg = f"aluno{i}@escola.com", f"Musica {i}", "Para a turma"
+        tipo = i % 10
+        if tipo == 0:
+            email = f"banido{i % 50}@escola.com"
+        elif tipo == 1:
+            nome = "www.spam.com"
+        elif tipo == 2:
+            msg = "x" * 100
+        rows.append(["01/01/2025 10:00:00", email, nome, msg, _link(i), "", ""])
+    return rows
+
+def gerar_blacklist():
+    return [["Email"]] + [[f"banido{i}@escola.com"] for i in range(50)]
+
+def gerar_moderacao(n):
+    rows = [CABECALHO]
+    for i in range(n):
+        status, status_msg = [("Aceito", "Ler apenas o nome"), ("Recusado", ""), ("Aguardando Aprovação", "")][i % 3]
+        rows.append(["01/01/2025 10:00:00", f"aluno{i}@escola.com", f"Musica {i}", "Oi", _link(i), status, status_msg])
+    return rows
+
+def gerar_playlist(n):
+    rows = [CABECALHO]
+    for i in range(n):
+        status = "Tocado" if i % 2 == 0 else "Aceito"
+        rows.append(["01/01/2025 10:00:00", f"aluno{i}@escola.com", f"Musica {i}", "Oi", _link(i), status, "Ler apenas o nome"])
+    return rows
+
+def abas_vazias():
+    return {
+        "Pedidos": [CABECALHO],
+        "Playlist": [CABECALHO],
+        "Historico": [CABECALHO + ["Observação"]],
+        "Moderação": [CABECALHO],
+        "Blacklist": gerar_blacklist(),
+        "Horarios": [["Inicio", "Fim", "Ativo"], ["07:00", "07:30", "Sim"]],
+    }
+
+# ==============================
+# YOUTUBE FAKE (sem rede)
+# ==============================
+class YoutubeDLFake:
+    latencia = 0.0
+
+    def __init__(self, opts=None):
+        self.opts = opts or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False):
+        if self.latencia:
+            time.sleep(self.latencia)
+        vid = url.rsplit("=", 1)[-1]
+        return {"id": vid, "title": f"Video {vid}", "duration": 180, "age_limit": 0, "_type": "video"}
+
+# ==============================
+# EXECUÇÃO
+# ==============================
+def medir(fake, nome, tamanho, funcao):
+    fake.registro.zerar()
+    t = time.perf_counter()
+    funcao()
+    dt = time.perf_counter() - t
+    return {
+        "cenario": nome,
+        "linhas": tamanho,
+        "chamadas": fake.registro.total(),
+        "bytes": fake.registro.bytes(),
+        "tempo": dt,
+        "metodos": dict(fake.registro.por_metodo()),
+    }
+
+def preparar_back(fake):
+    try:
+        back = importlib.import_module("back")
+    except ImportError as e:
+        print(f"[bench] back.py ignorado (dependência ausente: {e})")
+        return None
+    back.yt_dlp.YoutubeDL = YoutubeDLFake
+    return back
+
+def preparar_main(fake):
+    try:
+        main = importlib.import_module("main")
+    except ImportError as e:
+        print(f"[bench] main.py ignorado (dependência ausente: {e})")
+        return None
+    main.conectar_planilha()
+    return main
+
+def cenarios_back(back, fake, n):
+    def pedidos():
+        fake.aba_fake("Pedidos").carregar(gerar_pedidos(n))
+        return lambda: back.processar_pedidos()
+
+    def moderacao():
+        fake.aba_fake("Moderação").carregar(gerar_moderacao(n))
+        fake.aba_fake("Playlist").carregar([CABECALHO])
+        return lambda: back.processar_moderacao()
+
+    def horarios():
+        fake.aba_fake("Playlist").carregar(gerar_playlist(n))
+        return lambda: back.mover_playlist_para_historico_quando_fora_do_horario()
+
+    def pedidos_ocioso():
+        # processa, absorve as próprias escritas e mede um ciclo sem nenhuma mudança
+        fake.aba_fake("Pedidos").carregar(gerar_pedidos(n))
+        back.snap_pedidos.invalidar()
+        for _ in range(2):
+            back.abas.invalidar()
+            back.ciclo_pedidos()
+        back.abas.invalidar()
+        return lambda: back.ciclo_pedidos()
+
+    return [("processar_pedidos", pedidos), ("processar_moderacao", moderacao),
+            ("mover_playlist_fora_do_horario", horarios), ("ciclo_pedidos_ocioso", pedidos_ocioso)]
+
+def cenarios_main(main, fake, n):
+    def leitura():
+        fake.aba_fake("Playlist").carregar(gerar_playlist(n))
+        main.cursor_playlist = main.CursorPlaylist(arquivo=f"cursor_{n}.json")
+        main.linha_fim_atual = None
+        main.fim_da_lista = False
+        main.download_queue.limpar()
+        main.baixando_musicas.clear()
+        return lambda: main.ler_novas_musicas()
+
+    return [("ler_novas_musicas", leitura)]
+
+def imprimir(resultados):
+    print(f"{'cenário':<34}{'linhas':>8}{'chamadas':>10}{'bytes':>12}{'tempo (s)':>11}  métodos")
+    for r in resultados:
+        metodos = ", ".join(f"{k}={v}" for k, v in sorted(r["metodos"].items()))
+        print(f"{r['cenario']:<34}{r['linhas']:>8}{r['chamadas']:>10}{r['bytes']:>12}{r['tempo']:>11.3f}  {metodos}")
+
+def main_bench(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", default="10,1000,10000", help="nº de linhas das planilhas sintéticas")
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência artificial por chamada ao Sheets (s)")
+    parser.add_argument("--latencia-yt", type=float, default=0.0, help="latência artificial por extract_info (s)")
+    parser.add_argument("--limite-por-minuto", type=int, default=0,
+                        help="limitador do Sheets durante o benchmark (0 = sem limite)")
+    parser.add_argument("--max-chamadas", type=int, default=None, help="falha se algum ciclo fizer mais chamadas")
+    parser.add_argument("--verbose", action="store_true", help="mantém os logs INFO dos programas")
+    args = parser.parse_args(argv)
+
+    # roda numa pasta temporária: logs, downloads/ e caches em disco não contaminam o projeto
+    os.chdir(tempfile.mkdtemp(prefix="bench_radio_"))
+    YoutubeDLFake.latencia = args.latencia_yt
+    if args.limite_por_minuto:
+        planilha.limitador = planilha.LimitadorTaxa(por_minuto=args.limite_por_minuto)
+    else:
+        planilha.limitador = planilha.LimitadorTaxa(por_minuto=10**9, rajada=10**9)
+    fake = PlanilhaFake(abas_vazias(), latencia=args.latencia)
+    planilha.registrar_cliente(ClienteFake(fake), "creds.json")
+
+    resultados = []
+    fake.registro.zerar()
+    back = preparar_back(fake)
+    main = preparar_main(fake)
+    resultados.append({"cenario": "inicializacao", "linhas": 0, "chamadas": fake.registro.total(),
+                       "bytes": fake.registro.bytes(), "tempo": 0.0, "metodos": dict(fake.registro.por_metodo())})
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    for n in [int(x) for x in args.tamanhos.split(",") if x.strip()]:
+        cenarios = []
+        if back:
+            cenarios += cenarios_back(back, fake, n)
+        if main:
+            cenarios += cenarios_main(main, fake, n)
+        for nome, preparar in cenarios:
+            resultados.append(medir(fake, nome, n, preparar()))
+
+    imprimir(resultados)
+
+    if args.max_chamadas is not None:
+        estourou = [r for r in resultados if r["chamadas"] > args.max_chamadas]
+        if estourou:
+            print(f"[bench] {len(estourou)} ciclo(s) acima de {args.max_chamadas} chamadas.")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,105 @@
+"""
+Intervalo (silêncio) entre faixas do player, medido pelos eventos do VLC no reprodutor.Reprodutor.
+
+Compara:
+  - fim:    espera o fim da faixa e só então abre a próxima (como o player fazia; EMENDAR_FAIXAS = False)
+  - emenda: próxima faixa pré-carregada no player livre e iniciada ANTECEDENCIA seg antes do fim
+e mostra o intervalo médio, p95 e máximo entre o fim de uma faixa e o início da seguinte
+(sobreposição conta como 0 ms).
+
+Precisa do VLC instalado. Por padrão usa a saída de áudio "dummy" (roda em servidor sem som).
+
+Uso (na raiz do projeto):
+    python bench/bench_emenda.py
+    python bench/bench_emenda.py --faixas 50 --duracao 1 --antecedencia 0.1
+    python bench/bench_emenda.py --max-intervalo 100   # sai com erro se alguma emenda passar disso (ms)
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from queue import Queue, Empty
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_soak import gerar_wav
+
+MODOS = ("fim", "emenda")
+
+def esperar(eventos, nome, geracao, timeout):
+    """Espera o evento 'nome' da faixa 'geracao' (descarta os das faixas anteriores)."""
+    limite = time.time() + timeout
+    while True:
+        try:
+            n, g = eventos.get(timeout=max(0.0, limite - time.time()))
+        except Empty:
+            return False
+        if g == geracao and n in (nome, "erro"):
+            return n == nome
+
+def rodar_modo(modo, args, arquivos):
+    from reprodutor import Reprodutor, OPCOES_VLC
+    opcoes = list(OPCOES_VLC) + ([f"--aout={args.aout}"] if args.aout else [])
+    eventos = Queue()
+    tocador = Reprodutor(lambda nome, geracao: eventos.put((nome, geracao)), opcoes)
+    timeout = args.duracao + 5
+    travadas = 0
+
+    geracao = tocador.abrir(arquivos[0])
+    for i in range(1, args.faixas + 1):
+        proximo = arquivos[i % len(arquivos)]
+        if modo == "fim":
+            if not esperar(eventos, "fim", geracao, timeout):
+                travadas += 1
+        else:
+            if not esperar(eventos, "tocando", geracao, timeout):
+                travadas += 1
+            tocador.preparar(proximo)
+            restante = tocador.restante()
+            if restante is not None:
+                time.sleep(max(0.0, restante - args.antecedencia))
+        if i < args.faixas:
+            geracao = tocador.abrir(proximo, emendar=True)
+    time.sleep(args.duracao)  # deixa a última emenda ser medida
+
+    intervalos = sorted(max(0.0, x) for x in tocador.intervalos)
+    tocador.fechar()
+    if not intervalos:
+        print(f"[{modo}] nenhuma emenda medida (travadas={travadas}).")
+        return None
+    p95 = intervalos[min(len(intervalos) - 1, int(len(intervalos) * 0.95))]
+    print(f"[{modo:<6}] {len(intervalos)} emendas | intervalo méd {sum(intervalos) / len(intervalos):6.1f} ms | "
+          f"p95 {p95:6.1f} ms | máx {intervalos[-1]:6.1f} ms | travadas={travadas}")
+    return intervalos[-1]
+
+def main_bench(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modo", choices=MODOS + ("ambos",), default="ambos")
+    parser.add_argument("--faixas", type=int, default=30, help="nº de faixas tocadas em sequência")
+    parser.add_argument("--duracao", type=float, default=2.0, help="duração de cada faixa sintética (s)")
+    parser.add_argument("--antecedencia", type=float, default=0.15,
+                        help="seg antes do fim em que a próxima começa (ANTECEDENCIA_EMENDA do main.py)")
+    parser.add_argument("--aout", default="dummy", help="saída de áudio do VLC ('' = padrão do sistema)")
+    parser.add_argument("--max-intervalo", type=float, default=None,
+                        help="falha se alguma emenda do modo 'emenda' passar disso (ms)")
+    args = parser.parse_args(argv)
+
+    pasta = tempfile.mkdtemp(prefix="bench_emenda_")
+    arquivos = [gerar_wav(os.path.join(pasta, f"faixa{i}.wav"), args.duracao) for i in range(2)]
+    maximo = None
+    for modo in (MODOS if args.modo == "ambos" else (args.modo,)):
+        resultado = rodar_modo(modo, args, arquivos)
+        if modo == "emenda":
+            maximo = resultado
+
+    if args.max_intervalo is not None and args.modo != "fim":
+        if maximo is None or maximo > args.max_intervalo:
+            print(f"[bench] emenda acima de {args.max_intervalo} ms.")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,146 @@
+"""
+Teste de resistência (soak) do player: toca milhares de faixas curtas seguidas e acompanha a RSS.
+
+Compara, cada um num processo separado:
+  - antigo:     um MediaPlayer novo por faixa, eventos ligados nele e nunca liberado (como o main.py fazia)
+  - reprodutor: reprodutor.Reprodutor, com um vlc.Instance, players reaproveitados e release da mídia
+e mostra a RSS ao longo das faixas e o crescimento depois do aquecimento (MB por 1000 faixas).
+
+Precisa do VLC instalado. Por padrão usa a saída de áudio "dummy" (roda em servidor sem som).
+
+Uso (na raiz do projeto):
+    python bench/bench_soak.py
+    python bench/bench_soak.py --faixas 5000 --duracao 0.1
+    python bench/bench_soak.py --modo reprodutor --max-crescimento 5   # sai com erro se a RSS subir mais que isso
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+import subprocess
+from queue import Queue, Empty
+
+import psutil
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+MODOS = ("antigo", "reprodutor")
+
+# ==============================
+# FAIXA SINTÉTICA
+# ==============================
+def gerar_wav(caminho, duracao, taxa=22050):
+    """Silêncio mono de 'duracao' segundos (sem depender de nenhum arquivo de música)."""
+    with wave.open(caminho, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(taxa)
+        w.writeframes(b"\x00\x00" * int(taxa * duracao))
+    return caminho
+
+# ==============================
+# MODOS
+# ==============================
+class Antigo:
+    """Um MediaPlayer por faixa, como o player fazia antes do Reprodutor (nada é liberado)."""
+    def __init__(self, ao_evento, opcoes):
+        import vlc
+        self.vlc = vlc
+        self._instancia = vlc.Instance(*opcoes)
+        self._ao_evento = ao_evento
+        self._player = None
+        self.geracao = 0
+
+    def abrir(self, arquivo):
+        if self._player:
+            self._player.stop()
+        self.geracao += 1
+        geracao = self.geracao
+        self._player = self._instancia.media_player_new(arquivo)
+        em = self._player.event_manager()
+        em.event_attach(self.vlc.EventType.MediaPlayerEndReached, lambda ev: self._ao_evento("fim", geracao))
+        em.event_attach(self.vlc.EventType.MediaPlayerEncounteredError, lambda ev: self._ao_evento("erro", geracao))
+        self._player.play()
+        return geracao
+
+def criar(modo, ao_evento, opcoes):
+    if modo == "antigo":
+        return Antigo(ao_evento, opcoes)
+    from reprodutor import Reprodutor
+    return Reprodutor(ao_evento, opcoes)
+
+# ==============================
+# EXECUÇÃO
+# ==============================
+def rss_mb(processo):
+    return processo.memory_info().rss / 1024 ** 2
+
+def rodar_modo(args):
+    from reprodutor import OPCOES_VLC
+    opcoes = list(OPCOES_VLC) + ([f"--aout={args.aout}"] if args.aout else [])
+    arquivo = gerar_wav(os.path.join(tempfile.mkdtemp(prefix="bench_soak_"), "faixa.wav"), args.duracao)
+    eventos = Queue()
+    tocador = criar(args.modo, lambda nome, geracao: eventos.put((nome, geracao)), opcoes)
+    processo = psutil.Process()
+
+    amostras, travadas, erros = [], 0, 0
+    aquecimento = max(1, args.faixas // 10)
+    t = time.perf_counter()
+    for i in range(1, args.faixas + 1):
+        geracao = tocador.abrir(arquivo)
+        while True:
+            try:
+                nome, g = eventos.get(timeout=args.duracao + 5)
+            except Empty:
+                travadas += 1
+                break
+            if g == geracao:
+                erros += nome == "erro"
+                break
+        if i % args.amostra == 0 or i == aquecimento or i == args.faixas:
+            amostras.append((i, rss_mb(processo)))
+            print(f"[{args.modo}] faixa {i:>6}  RSS {amostras[-1][1]:8.1f} MB", flush=True)
+    dt = time.perf_counter() - t
+
+    base = next(rss for i, rss in amostras if i >= aquecimento)
+    crescimento = amostras[-1][1] - base
+    por_mil = crescimento / max(1, args.faixas - aquecimento) * 1000
+    print(f"[{args.modo}] {args.faixas} faixas em {dt:.1f}s | travadas={travadas} erros={erros} | "
+          f"RSS depois do aquecimento: {base:.1f} -> {amostras[-1][1]:.1f} MB "
+          f"({crescimento:+.1f} MB, {por_mil:+.2f} MB/1000 faixas)")
+    if travadas:
+        return 2
+    if args.max_crescimento is not None and crescimento > args.max_crescimento:
+        print(f"[{args.modo}] crescimento acima de {args.max_crescimento} MB.")
+        return 1
+    return 0
+
+def main_bench(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modo", choices=MODOS + ("ambos",), default="ambos")
+    parser.add_argument("--faixas", type=int, default=1000, help="nº de faixas tocadas em sequência")
+    parser.add_argument("--duracao", type=float, default=0.2, help="duração de cada faixa sintética (s)")
+    parser.add_argument("--amostra", type=int, default=100, help="mede a RSS a cada N faixas")
+    parser.add_argument("--aout", default="dummy", help="saída de áudio do VLC ('' = padrão do sistema)")
+    parser.add_argument("--max-crescimento", type=float, default=None,
+                        help="falha se a RSS crescer mais que isso (MB) depois do aquecimento")
+    args = parser.parse_args(argv)
+
+    if args.modo != "ambos":
+        return rodar_modo(args)
+
+    # um processo por modo: a memória que o modo antigo vaza não contamina a medida do outro
+    resultado = 0
+    for modo in MODOS:
+        cmd = [sys.executable, os.path.abspath(__file__), "--modo", modo, "--faixas", str(args.faixas),
+               "--duracao", str(args.duracao), "--amostra", str(args.amostra), "--aout", args.aout]
+        if args.max_crescimento is not None and modo == "reprodutor":
+            cmd += ["--max-crescimento", str(args.max_crescimento)]
+        resultado = max(resultado, subprocess.call(cmd))
+    return resultado
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
@@ -0,0 +1,296 @@
+"""
+Planilha em memória que imita a parte da API do gspread usada pelo main.py e pelo back.py.
+
+Cada chamada é registrada (método, aba, bytes trafegados, tempo) e pode ter latência
+artificial, para medir quantas idas à API um ciclo faz sem tocar no Google Sheets.
+"""
+import re
+import json
+import time
+import threading
+from collections import Counter
+
+# ==============================
+# UTIL A1
+# ==============================
+_RE_CELULA = re.compile(r"^([A-Z]*)(\d*)$")
+
+def _col_para_num(letras):
+    n = 0
+    for c in letras:
+        n = n * 26 + (ord(c) - ord("A") + 1)
+    return n
+
+def _num_para_col(n):
+    letras = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        letras = chr(ord("A") + r) + letras
+    return letras
+
+def _parse_a1(rng):
+    """'C2:G20' -> (linha_ini, col_ini, linha_fim, col_fim), 1-based; None = em aberto."""
+    if "!" in rng:
+        rng = rng.split("!", 1)[1]
+    partes = rng.upper().split(":")
+    ini = _RE_CELULA.match(partes[0])
+    fim = _RE_CELULA.match(partes[-1])
+    l1 = int(ini.group(2)) if ini.group(2) else 1
+    c1 = _col_para_num(ini.group(1)) if ini.group(1) else 1
+    l2 = int(fim.group(2)) if fim.group(2) else None
+    c2 = _col_para_num(fim.group(1)) if fim.group(1) else None
+    return l1, c1, l2, c2
+
+def _tamanho(obj):
+    try:
+        return len(json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+# ==============================
+# REGISTRO DE CHAMADAS
+# ==============================
+class RegistroChamadas:
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self._lock = threading.Lock()
+        self.zerar()
+
+    def zerar(self):
+        with self._lock:
+            self.chamadas = []  # (metodo, aba, bytes, segundos)
+
+    def registrar(self, metodo, aba, enviado, recebido, inicio):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.chamadas.append((metodo, aba, _tamanho(enviado) + _tamanho(recebido), time.perf_counter() - inicio))
+
+    def total(self):
+        return len(self.chamadas)
+
+    def bytes(self):
+        return sum(c[2] for c in self.chamadas)
+
+    def por_metodo(self):
+        return Counter(c[0] for c in self.chamadas)
+
+# ==============================
+# ABA / PLANILHA FAKE
+# ==============================
+class AbaFake:
+    def __init__(self, planilha, titulo, sheet_id, linhas=None, colunas=26, linhas_grade=1000):
+        self.spreadsheet = planilha
+        self.title = titulo
+        self.id = sheet_id
+        self._colunas = colunas
+        self._grade = linhas_grade   # tamanho da grade (como no Sheets: não é o nº de linhas preenchidas)
+        self._linhas = [list(r) for r in (linhas or [])]
+        self._lock = threading.RLock()
+
+    # ---- helpers internos (não contam como chamada) ----
+    def carregar(self, linhas):
+        with self._lock:
+            self._linhas = [[str(c) for c in r] for r in linhas]
+            self.spreadsheet.versao += 1
+
+    def _reg(self, metodo, enviado, recebido, inicio):
+        self.spreadsheet.registro.registrar(metodo, self.title, enviado, recebido, inicio)
+
+    def _ultima_nao_vazia(self):
+        for i in range(len(self._linhas) - 1, -1, -1):
+            if any((c or "").strip() for c in self._linhas[i]):
+                return i + 1
+        return 0
+
+    def _garantir(self, linha, coluna):
+        while len(self._linhas) < linha:
+            self._linhas.append([])
+        r = self._linhas[linha - 1]
+        while len(r) < coluna:
+            r.append("")
+
+    def _ler(self, l1, c1, l2, c2):
+        l2 = l2 or len(self._linhas)
+        out = []
+        for i in range(l1, l2 + 1):
+            r = self._linhas[i - 1] if i - 1 < len(self._linhas) else []
+            fim = c2 or len(r)
+            trecho = [str(c) for c in r[c1 - 1:fim]]
+            while trecho and trecho[-1] == "":
+                trecho.pop()
+            out.append(trecho)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _escrever(self, l1, c1, valores):
+        self.spreadsheet.versao += 1
+        for i, r in enumerate(valores):
+            for j, v in enumerate(r):
+                self._garantir(l1 + i, c1 + j)
+                self._linhas[l1 + i - 1][c1 + j - 1] = "" if v is None else str(v)
+
+    # ---- propriedades ----
+    @property
+    def row_count(self):
+        return max(len(self._linhas), self._grade)
+
+    @property
+    def col_count(self):
+        return self._colunas
+
+    # ---- API gspread ----
+    def get_all_values(self):
+        t = time.perf_counter()
+        with self._lock:
+            ate = self._ultima_nao_vazia()
+            largura = max((len(r) for r in self._linhas[:ate]), default=0)
+            out = [[str(c) for c in r] + [""] * (largura - len(r)) for r in self._linhas[:ate]]
+        self._reg("get_all_values", None, out, t)
+        return out
+
+    def get(self, rng):
+        t = time.perf_counter()
+        with self._lock:
+            out = self._ler(*_parse_a1(rng))
+        self._reg("get", rng, out, t)
+        return out
+
+    def col_values(self, col):
+        t = time.perf_counter()
+        with self._lock:
+            out = [r[col - 1] if len(r) >= col else "" for r in self._linhas[:self._ultima_nao_vazia()]]
+            while out and out[-1] == "":
+                out.pop()
+        self._reg("col_values", col, out, t)
+        return out
+
+    def append_rows(self, values, value_input_option="RAW", **kwargs):
+        t = time.perf_counter()
+        with self._lock:
+            inicio = self._ultima_nao_vazia() + 1
+            self._escrever(inicio, 1, values)
+            fim = inicio + len(values) - 1
+            largura = max((len(r) for r in values), default=1)
+            resp = {"updates": {"updatedRange": f"{self.title}!A{inicio}:{_num_para_col(largura)}{fim}",
+                                "updatedRows": len(values)}}
+        self._reg("append_rows", values, resp, t)
+        return resp
+
+    def append_row(self, values, value_input_option="RAW", **kwargs):
+        t = time.perf_counter()
+        with self._lock:
+            inicio = self._ultima_nao_vazia() + 1
+            self._escrever(inicio, 1, [values])
+            resp = {"updates": {"updatedRange": f"{self.title}!A{inicio}:{_num_para_col(max(len(values), 1))}{inicio}",
+                                "updatedRows": 1}}
+        self._reg("append_row", values, resp, t)
+        return resp
+
+    def update(self, range_name, values=None, **kwargs):
+        # aceita a assinatura antiga (range, values) e a nova (values, range)
+        if not isinstance(range_name, str):
+            range_name, values = values, range_name
+        t = time.perf_counter()
+        with self._lock:
+            l1, c1, _, _ = _parse_a1(range_name)
+            self._escrever(l1, c1, values)
+        self._reg("update", [range_name, values], None, t)
+
+    def update_cell(self, row, col, value):
+        t = time.perf_counter()
+        with self._lock:
+            self._escrever(row, col, [[value]])
+        self._reg("update_cell", [row, col, value], None, t)
+
+    def batch_update(self, data, **kwargs):
+        t = time.perf_counter()
+        with self._lock:
+            for item in data:
+                l1, c1, _, _ = _parse_a1(item["range"])
+                self._escrever(l1, c1, item["values"])
+        self._reg("batch_update", data, None, t)
+
+    def batch_clear(self, ranges):
+        t = time.perf_counter()
+        with self._lock:
+            self.spreadsheet.versao += 1
+            for rng in ranges:
+                l1, c1, l2, c2 = _parse_a1(rng)
+                for i in range(l1, min(l2 or len(self._linhas), len(self._linhas)) + 1):
+                    r = self._linhas[i - 1]
+                    for j in range(c1, min(c2 or len(r), len(r)) + 1):
+                        r[j - 1] = ""
+        self._reg("batch_clear", ranges, None, t)
+
+    def delete_rows(self, start_index, end_index=None):
+        t = time.perf_counter()
+        with self._lock:
+            self.spreadsheet.versao += 1
+            self._grade = max(1, self.row_count - ((end_index or start_index) - start_index + 1))
+            del self._linhas[start_index - 1:(end_index or start_index)]
+        self._reg("delete_rows", [start_index, end_index], None, t)
+
+class PlanilhaFake:
+    def __init__(self, abas, latencia=0.0):
+        """abas: {titulo: [linhas]}"""
+        self.registro = RegistroChamadas(latencia)
+        self.id = "planilha-fake"
+        self.versao = 0  # sobe a cada escrita (faz o papel do modifiedTime do Drive)
+        self._abas = {}
+        for i, (titulo, linhas) in enumerate(abas.items()):
+            self._abas[titulo] = AbaFake(self, titulo, i, linhas)
+
+    def aba_fake(self, titulo):
+        return self._abas[titulo]
+
+    def worksheets(self):
+        t = time.perf_counter()
+        out = list(self._abas.values())
+        self.registro.registrar("worksheets", "", None, [[ws.title, ws.id, ws.row_count, ws.col_count] for ws in out], t)
+        return out
+
+    def worksheet(self, titulo):
+        t = time.perf_counter()
+        self.registro.registrar("worksheet", titulo, None, None, t)
+        return self._abas[titulo]
+
+    def get_lastUpdateTime(self):
+        t = time.perf_counter()
+        valor = f"2025-01-01T00:00:00.{self.versao:06d}Z"
+        self.registro.registrar("get_lastUpdateTime", "", None, valor, t)
+        return valor
+
+    def fetch_sheet_metadata(self, params=None):
+        """Metadados no formato da API (properties.gridProperties)."""
+        t = time.perf_counter()
+        meta = {"sheets": [{"properties": {
+            "title": ws.title, "sheetId": ws.id,
+            "gridProperties": {"rowCount": ws.row_count, "columnCount": ws.col_count},
+        }} for ws in self._abas.values()]}
+        self.registro.registrar("fetch_sheet_metadata", "", params, meta, t)
+        return meta
+
+    def batch_update(self, body):
+        t = time.perf_counter()
+        por_id = {ws.id: ws for ws in self._abas.values()}
+        for req in body.get("requests", []):
+            if "deleteDimension" in req:
+                rng = req["deleteDimension"]["range"]
+                ws = por_id[rng["sheetId"]]
+                with ws._lock:
+                    self.versao += 1
+                    del ws._linhas[rng["startIndex"]:rng["endIndex"]]
+        self.registro.registrar("spreadsheet.batch_update", "", body, None, t)
+        return {"replies": [{} for _ in body.get("requests", [])]}
+
+class ClienteFake:
+    """Substitui o gspread.Client: open_by_key devolve sempre a mesma planilha em memória."""
+    def __init__(self, planilha):
+        self.planilha = planilha
+
+    def open_by_key(self, key):
+        t = time.perf_counter()
+        self.planilha.registro.registrar("open_by_key", key, key, None, t)
+        return self.planilha
@@ -0,0 +1,317 @@
+"""
+Gerenciador do cache de músicas baixadas (downloads/<letra>/).
+
+- manifesto em disco (SQLite) com id, título, caminho, tamanho, duração e codec de cada música:
+  na inicialização só as subpastas cuja mtime mudou são relidas (nada de listar tudo de novo);
+- mantém o total em bytes do cache e um histórico de reprodução em disco;
+- quando passa da cota (ou o disco fica sem espaço livre), uma thread em segundo plano
+  apaga as músicas menos úteis (LRU: tocada há mais tempo; LFU: tocada menos vezes)
+  até voltar para abaixo da cota, sem bloquear quem está baixando;
+- as músicas fixadas (fila atual / tocando agora) nunca são apagadas;
+- arquivos temporários do yt_dlp/ffmpeg (.part, .ytdl, .temp.*) nunca entram no índice e os
+  abandonados há mais de IDADE_MAX_PARCIAL são apagados; arquivos pequenos demais são ignorados;
+- estatísticas: acertos/falhas do cache e bytes removidos.
+"""
+import os
+import time
+import stat
+import shutil
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+log = logging.getLogger("cache_musicas")
+
+QUOTA_CACHE = 8 * 1024 ** 3           # bytes
+ESPACO_LIVRE_MINIMO = 512 * 1024 ** 2 # bytes livres no disco abaixo dos quais também limpa
+MARGEM_LIMPEZA = 0.9                  # limpa até ficar em 90% da cota (não limpa a cada download)
+INTERVALO_LIMPEZA = 300               # seg entre verificações periódicas
+POLITICAS = ("lru", "lfu")
+TAMANHO_MINIMO = 16 * 1024            # bytes: abaixo disso o arquivo é considerado quebrado
+IDADE_MAX_PARCIAL = 24 * 3600         # seg: .part mais antigo que isso não vai mais ser retomado
+
+def eh_temporario(nome):
+    """Arquivo intermediário do yt_dlp / ffmpeg (download em andamento ou interrompido)."""
+    nome = nome.lower()
+    return nome.endswith((".part", ".ytdl", ".tmp")) or ".part-frag" in nome or ".temp." in nome
+
+def _codec(caminho):
+    """Codec pela extensão do arquivo (mp3, opus, m4a...)."""
+    return os.path.splitext(caminho)[1].lstrip(".").lower() or None
+
+class GerenciadorCache:
+    def __init__(self, pasta, caminho_db, quota=QUOTA_CACHE, politica="lru",
+                 fixadas=None, ao_remover=None, espaco_livre_minimo=ESPACO_LIVRE_MINIMO):
+        """
+        fixadas(): conjunto de caminhos que não podem ser apagados agora;
+        ao_remover(caminho): chamado depois de apagar um arquivo (para tirar dos índices).
+        """
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de cache inválida: {politica} (use {', '.join(POLITICAS)})")
+        self.pasta = pasta
+        self.caminho_db = caminho_db
+        self.quota = quota
+        self.politica = politica
+        self.espaco_livre_minimo = espaco_livre_minimo
+        self._fixadas = fixadas or (lambda: set())
+        self._ao_remover = ao_remover or (lambda caminho: None)
+        self._lock = threading.Lock()
+        self._arquivos = {}    # caminho -> bytes
+        self._uso = {}         # caminho -> (ultimo_uso, usos)
+        self._total = 0
+        self._acordar = threading.Event()
+        self.contadores = {"acertos": 0, "falhas": 0, "removidas": 0, "bytes_removidos": 0}
+        with self._conectar() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS reproducoes ("
+                " caminho TEXT PRIMARY KEY, ultimo_uso REAL NOT NULL, usos INTEGER NOT NULL)"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS arquivos ("
+                " caminho TEXT PRIMARY KEY, pasta TEXT NOT NULL, video_id TEXT, titulo TEXT,"
+                " tamanho INTEGER NOT NULL, duracao REAL, codec TEXT)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS arquivos_pasta ON arquivos (pasta)")
+            con.execute("CREATE TABLE IF NOT EXISTS pastas (pasta TEXT PRIMARY KEY, mtime REAL NOT NULL)")
+            for caminho, ultimo, usos in con.execute("SELECT caminho, ultimo_uso, usos FROM reproducoes"):
+                self._uso[caminho] = (ultimo, usos)
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(self.caminho_db, timeout=10)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    # ---- manifesto ----
+    def reconciliar(self, interpretar, extensoes):
+        """
+        Acerta o manifesto com o disco e devolve [(caminho, video_id, titulo, duracao)] de todas as músicas.
+        Só relista as subpastas com mtime diferente da salva (criar/apagar/renomear arquivo muda a mtime da pasta).
+        interpretar(caminho) -> (video_id, titulo) para arquivos que ainda não estão no manifesto.
+        """
+        inicio = time.time()
+        relidas = 0
+        with self._conectar() as con:
+            salvas = dict(con.execute("SELECT pasta, mtime FROM pastas"))
+            atuais = set()
+            for sub in os.listdir(self.pasta):
+                pasta = os.path.join(self.pasta, sub)
+                try:
+                    st = os.stat(pasta)
+                except OSError:
+                    continue
+                if not stat.S_ISDIR(st.st_mode):
+                    continue
+                atuais.add(pasta)
+                if salvas.get(pasta) == st.st_mtime:
+                    continue
+                relidas += 1
+                no_disco = set()
+                for f in os.listdir(pasta):
+                    caminho = os.path.join(pasta, f)
+                    if eh_temporario(f):
+                        self._limpar_parcial(caminho)
+                    elif f.lower().endswith(extensoes):
+                        no_disco.add(caminho)
+                no_manifesto = {r[0] for r in con.execute("SELECT caminho FROM arquivos WHERE pasta = ?", (pasta,))}
+                for caminho in no_manifesto - no_disco:
+                    con.execute("DELETE FROM arquivos WHERE caminho = ?", (caminho,))
+                for caminho in no_disco - no_manifesto:
+                    try:
+                        tamanho = os.path.getsize(caminho)
+                    except OSError:
+                        continue
+                    if tamanho < TAMANHO_MINIMO:
+                        log.warning(f"[CACHE] Ignorando arquivo incompleto ({tamanho} bytes): {caminho}")
+                        continue
+                    video_id, titulo = interpretar(caminho)
+                    con.execute(
+                        "INSERT OR REPLACE INTO arquivos (caminho, pasta, video_id, titulo, tamanho, duracao, codec)"
+                        " VALUES (?, ?, ?, ?, ?, NULL, ?)",
+                        (caminho, pasta, video_id, titulo, tamanho, _codec(caminho)),
+                    )
+                con.execute("INSERT OR REPLACE INTO pastas (pasta, mtime) VALUES (?, ?)", (pasta, st.st_mtime))
+            for pasta in set(salvas) - atuais:
+                con.execute("DELETE FROM arquivos WHERE pasta = ?", (pasta,))
+                con.execute("DELETE FROM pastas WHERE pasta = ?", (pasta,))
+            rows = con.execute("SELECT caminho, video_id, titulo, tamanho, duracao FROM arquivos").fetchall()
+
+        with self._lock:
+            self._arquivos = {r[0]: r[3] for r in rows}
+            self._total = sum(self._arquivos.values())
+            for caminho in self._arquivos:
+                self._uso.setdefault(caminho, (0.0, 0))
+        log.info(f"[CACHE] Manifesto: {len(rows)} músicas, {relidas} pasta(s) relida(s) em {time.time() - inicio:.2f}s.")
+        return [(r[0], r[1], r[2], r[4]) for r in rows]
+
+    @staticmethod
+    def _limpar_parcial(caminho):
+        """Apaga um temporário abandonado (os recentes ficam: o yt_dlp retoma o .part)."""
+        try:
+            if time.time() - os.path.getmtime(caminho) > IDADE_MAX_PARCIAL:
+                os.remove(caminho)
+                log.info(f"[CACHE] Temporário abandonado removido: {caminho}")
+        except OSError:
+            pass
+
+    def conferir(self, caminho):
+        """
+        1 stat: o arquivo ainda existe e tem o tamanho registrado? Se não, sai do índice e do manifesto
+        (ex.: apagado ou truncado por fora) e a música é tratada como não baixada.
+        """
+        with self._lock:
+            esperado = self._arquivos.get(caminho)
+        try:
+            tamanho = os.path.getsize(caminho)
+        except OSError:
+            tamanho = None
+        if tamanho is not None and (esperado is None or tamanho == esperado):
+            return True
+        log.warning(f"[CACHE] Arquivo do cache sumiu ou mudou de tamanho: {caminho}")
+        self.esquecer(caminho)
+        return False
+
+    def esquecer(self, caminho):
+        """Tira do índice e do manifesto (sem apagar o arquivo)."""
+        with self._lock:
+            self._total -= self._arquivos.pop(caminho, 0)
+        try:
+            with self._conectar() as con:
+                con.execute("DELETE FROM arquivos WHERE caminho = ?", (caminho,))
+        except Exception as e:
+            log.warning(f"[CACHE] Erro ao atualizar o manifesto ({caminho}): {e}")
+        self._ao_remover(caminho)
+
+    def registrar(self, caminho, video_id=None, titulo=None, duracao=None):
+        """Arquivo novo (ou reindexado) no cache. Acorda a limpeza se passou da cota."""
+        try:
+            tamanho = os.path.getsize(caminho)
+        except OSError:
+            return
+        with self._lock:
+            self._total += tamanho - self._arquivos.get(caminho, 0)
+            self._arquivos[caminho] = tamanho
+            self._uso.setdefault(caminho, (self._mtime(caminho), 0))
+            acima = self._total > self.quota
+        try:
+            with self._conectar() as con:
+                con.execute(
+                    "INSERT OR REPLACE INTO arquivos (caminho, pasta, video_id, titulo, tamanho, duracao, codec)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (caminho, os.path.dirname(caminho), video_id, titulo, tamanho, duracao, _codec(caminho)),
+                )
+        except Exception as e:
+            log.warning(f"[CACHE] Erro ao salvar no manifesto ({caminho}): {e}")
+        if acima:
+            self._acordar.set()
+
+    @staticmethod
+    def _mtime(caminho):
+        try:
+            return os.path.getmtime(caminho)
+        except OSError:
+            return 0.0
+
+    # ---- histórico / estatísticas ----
+    def tocou(self, caminho):
+        """Registra uma reprodução (base do LRU/LFU)."""
+        if not caminho:
+            return
+        agora = time.time()
+        with self._lock:
+            usos = self._uso.get(caminho, (0.0, 0))[1] + 1
+            self._uso[caminho] = (agora, usos)
+        try:
+            with self._conectar() as con:
+                con.execute("INSERT OR REPLACE INTO reproducoes (caminho, ultimo_uso, usos) VALUES (?, ?, ?)",
+                            (caminho, agora, usos))
+        except Exception as e:
+            log.warning(f"[CACHE] Erro ao salvar histórico de reprodução: {e}")
+
+    def contar(self, acerto, ignorar=False):
+        """Conta uma consulta ao cache (ignorar=True: downloads antecipados não entram na taxa de acerto)."""
+        if ignorar:
+            return
+        with self._lock:
+            self.contadores["acertos" if acerto else "falhas"] += 1
+
+    def estatisticas(self):
+        with self._lock:
+            est = dict(self.contadores)
+            est["total"] = self._total
+            est["quota"] = self.quota
+            est["arquivos"] = len(self._arquivos)
+        consultas = est["acertos"] + est["falhas"]
+        est["taxa_acerto"] = 100.0 * est["acertos"] / consultas if consultas else 0.0
+        return est
+
+    # ---- limpeza ----
+    def _precisa_limpar(self):
+        if self._total > self.quota:
+            return True
+        try:
+            return shutil.disk_usage(self.pasta).free < self.espaco_livre_minimo
+        except OSError:
+            return False
+
+    def _chave(self, caminho):
+        ultimo, usos = self._uso.get(caminho, (0.0, 0))
+        return (ultimo, usos) if self.politica == "lru" else (usos, ultimo)
+
+    def limpar(self):
+        """Apaga músicas não fixadas até ficar abaixo de MARGEM_LIMPEZA da cota. Devolve os bytes liberados."""
+        with self._lock:
+            if not self._precisa_limpar():
+                return 0
+            candidatos = sorted(self._arquivos, key=self._chave)
+        fixadas = self._fixadas()
+        alvo = self.quota * MARGEM_LIMPEZA
+        liberados = 0
+        for caminho in candidatos:
+            with self._lock:
+                if self._total <= alvo and not self._precisa_limpar():
+                    break
+                if caminho in fixadas or caminho not in self._arquivos:
+                    continue
+                tamanho = self._arquivos.pop(caminho)
+                self._total -= tamanho
+                self._uso.pop(caminho, None)
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning(f"[CACHE] Não foi possível apagar {caminho}: {e}")
+                continue
+            self._ao_remover(caminho)
+            liberados += tamanho
+            with self._lock:
+                self.contadores["removidas"] += 1
+                self.contadores["bytes_removidos"] += tamanho
+            try:
+                with self._conectar() as con:
+                    con.execute("DELETE FROM reproducoes WHERE caminho = ?", (caminho,))
+                    con.execute("DELETE FROM arquivos WHERE caminho = ?", (caminho,))
+            except Exception:
+                pass
+        if liberados:
+            log.info(f"[CACHE] Limpeza ({self.politica.upper()}): {liberados / 1024 ** 2:.1f} MB liberados.")
+        return liberados
+
+    def _laco_limpeza(self):
+        while True:
+            self._acordar.wait(timeout=INTERVALO_LIMPEZA)
+            self._acordar.clear()
+            try:
+                self.limpar()
+            except Exception as e:
+                log.error(f"[CACHE] Erro na limpeza: {e}")
+
+    def iniciar(self):
+        """Sobe a thread de limpeza em segundo plano (e já faz uma verificação)."""
+        self._acordar.set()
+        threading.Thread(target=self._laco_limpeza, daemon=True, name="LimpezaCache").start()
@@ -0,0 +1,106 @@
+"""
+Cache persistente dos anúncios de voz (TTS).
+
+- endereçado pelo conteúdo: o nome do arquivo é o hash de (texto, voz, rate, volume),
+  então o mesmo anúncio nunca é sintetizado duas vezes;
+- LRU pela mtime do arquivo (tocada em cada acerto), com limite de tamanho da pasta;
+- nada de banco: o índice é montado listando a pasta (pequena) na inicialização.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+
+log = logging.getLogger("cache_tts")
+
+PASTA_CACHE_TTS = "tts_cache"
+TAMANHO_MAX_TTS = 200 * 1024 ** 2   # bytes
+
+class CacheTTS:
+    def __init__(self, pasta=PASTA_CACHE_TTS, tamanho_max=TAMANHO_MAX_TTS):
+        self.pasta = pasta
+        self.tamanho_max = tamanho_max
+        self._lock = threading.Lock()
+        self._arquivos = {}   # caminho -> (bytes, ultimo_uso)
+        self._total = 0
+        self.contadores = {"acertos": 0, "falhas": 0, "removidos": 0}
+        os.makedirs(pasta, exist_ok=True)
+        for nome in os.listdir(pasta):
+            caminho = os.path.join(pasta, nome)
+            if nome.endswith(".tmp"):
+                try:
+                    os.remove(caminho)  # síntese interrompida
+                except OSError:
+                    pass
+                continue
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            self._arquivos[caminho] = (st.st_size, st.st_mtime)
+            self._total += st.st_size
+
+    @staticmethod
+    def chave(texto, voz, rate, volume):
+        return hashlib.sha256("\x1f".join((texto.strip(), voz, rate, volume)).encode("utf-8")).hexdigest()[:32]
+
+    def caminho(self, texto, voz, rate, volume):
+        return os.path.join(self.pasta, f"{self.chave(texto, voz, rate, volume)}.mp3")
+
+    def obter(self, texto, vozes, rate, volume):
+        """Arquivo já sintetizado deste texto em qualquer uma das vozes, ou None."""
+        for voz in vozes:
+            caminho = self.caminho(texto, voz, rate, volume)
+            with self._lock:
+                if caminho not in self._arquivos:
+                    continue
+                tamanho = self._arquivos[caminho][0]
+                self._arquivos[caminho] = (tamanho, time.time())
+                self.contadores["acertos"] += 1
+            try:
+                os.utime(caminho)  # LRU sobrevive a reinícios
+            except OSError:
+                with self._lock:
+                    self._total -= self._arquivos.pop(caminho, (0, 0))[0]
+                continue
+            return caminho
+        with self._lock:
+            self.contadores["falhas"] += 1
+        return None
+
+    def adicionar(self, temporario, destino):
+        """Move o arquivo recém-sintetizado para o cache (rename atômico) e aplica o limite de tamanho."""
+        os.replace(temporario, destino)
+        tamanho = os.path.getsize(destino)
+        with self._lock:
+            self._total += tamanho - self._arquivos.get(destino, (0, 0))[0]
+            self._arquivos[destino] = (tamanho, time.time())
+            self._limpar(manter=destino)
+        return destino
+
+    def _limpar(self, manter=None):
+        if self._total <= self.tamanho_max:
+            return
+        for caminho, (tamanho, _) in sorted(self._arquivos.items(), key=lambda kv: kv[1][1]):
+            if self._total <= self.tamanho_max:
+                break
+            if caminho == manter:
+                continue
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning(f"[TTS] Não foi possível apagar {caminho}: {e}")
+                continue
+            del self._arquivos[caminho]
+            self._total -= tamanho
+            self.contadores["removidos"] += 1
+
+    def estatisticas(self):
+        with self._lock:
+            est = dict(self.contadores)
+            est["arquivos"] = len(self._arquivos)
+            est["total"] = self._total
+        return est
@@ -1,21 +1,30 @@
 import tkinter as tk
 from tkinter import ttk
-import vlc
 import yt_dlp
 import threading
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import psutil
-from queue import Queue
+from queue import Queue, Empty
+from collections import OrderedDict, Counter
+from contextlib import contextmanager
+import json
 import asyncio
+import concurrent.futures
 import edge_tts
-import tempfile
 import random
 import logging
+import itertools
+import shutil
+import subprocess
+
+import planilha
+from metadados import CacheMetadados, extrair_video_id
+from cache_musicas import GerenciadorCache, TAMANHO_MINIMO, eh_temporario
+from cache_tts import CacheTTS
+from reprodutor import Reprodutor
 
 # ===========================
 # LOGGING (console + arquivo)
@@ -38,32 +47,69 @@ os.makedirs(DOWNLOADS_DIR, exist_ok=True)
 CREDS_FILE = "creds.json"
 SPREADSHEET_ID = "x" # coloque o id de sua sheet aqui!
 LOTE_LEITURA = 20
+ARQUIVO_CURSOR = "cursor_playlist.json"   # posição de leitura da aba Playlist (sobrevive a reinícios)
+JANELA_RELOCALIZAR = 200                  # linhas procuradas em volta do cursor quando a aba muda acima dele
 INTERVALO_CHECK_NOVAS_MUSICAS = 60    # seg
 INTERVALO_CHECK_HORARIOS = 300        # seg
+NUM_WORKERS_DOWNLOAD = 3              # downloads simultâneos
+LIMITE_BANDA_WORKER = None            # bytes/s por worker (ex.: 512 * 1024); None = sem limite
+ESPERA_MAX_ORDEM = 180                # seg que um download lento segura os seguintes antes de ser passado para trás
+PREFETCH_K = 3                        # músicas à frente que ficam sempre prontas (ou baixando)
+ANTECEDENCIA_PREFETCH = 600           # seg: além das K, baixa o que vai tocar dentro desse prazo
+DURACAO_PADRAO = 240                  # seg, quando a duração do vídeo ainda não é conhecida
+TENTATIVAS_DOWNLOAD = 2               # tentativas por pedido, reaproveitando o info já resolvido
+TTL_INFO_RESOLVIDO = 3600             # seg que o info do yt_dlp de um download que falhou vale para novas tentativas
+REPETICOES_PEDIDO = 2                 # vezes que um pedido que falhou volta para a fila
+ESPERA_REPETICAO = 60                 # seg até o pedido que falhou voltar para a fila
+ARQUIVO_CACHE_MUSICAS = os.path.join(DOWNLOADS_DIR, "cache.db")  # manifesto + histórico de reprodução do cache
+QUOTA_CACHE_MUSICAS = 8 * 1024 ** 3   # bytes que downloads/ pode ocupar
+POLITICA_CACHE = "lru"                # "lru" (tocada há mais tempo sai antes) ou "lfu" (tocada menos vezes)
+TOLERANCIA_DURACAO = 0.9              # arquivo com menos que 90% da duração do vídeo = truncado
+PREAQUECIMENTO_ATIVO = True           # fora do horário, baixa antes o que deve ser pedido
+LIMITE_BANDA_PREAQUECIMENTO = 256 * 1024         # bytes/s durante o pré-aquecimento
+ORCAMENTO_PREAQUECIMENTO = 1024 ** 3             # bytes baixados por período fora do horário
+OCUPACAO_MAX_PREAQUECIMENTO = 0.8                # não passa de 80% da cota do cache (não força limpeza)
+TOP_HISTORICO = 50                               # músicas mais pedidas do Histórico a manter no cache
+INTERVALO_PREAQUECIMENTO = 1800                  # seg entre rodadas
+PASTA_CACHE_TTS = "tts_cache"         # anúncios já sintetizados (reaproveitados pelo texto)
+TAMANHO_MAX_CACHE_TTS = 200 * 1024 ** 2
+VOZES_TTS = ["pt-BR-ThalitaMultilingualNeural", "pt-BR-MacerioMultilingualNeural"]
+TTS_RATE = "-10%"
+TTS_VOLUME = "+30%"
+TTS_ANTECIPADOS = 3                   # anúncios das próximas músicas sintetizados com antecedência
+TTS_SIMULTANEAS = 3                   # sínteses ao mesmo tempo no serviço de TTS
+TIMEOUT_TTS = 30                      # seg esperando um anúncio antes de tocar a música sem ele
+MODO_ARMAZENAMENTO = "nativo"         # "nativo" (guarda o áudio do YouTube como veio: opus/m4a, só remux) ou "mp3" (recodifica 96 kbps)
+EMENDAR_FAIXAS = True                 # modo sem pausa: deixa a próxima faixa carregada e começa antes da atual acabar
+ANTECEDENCIA_EMENDA = 0.15            # seg antes do fim em que a próxima faixa começa (cobre a partida do VLC)
+CROSSFADE = 0.0                       # seg de crossfade entre uma música e a faixa seguinte (0 = sem)
+PASSO_CROSSFADE = 0.1                 # seg entre os ajustes de volume do crossfade
 
 # ===========================
 # GOOGLE SHEETS
 # ===========================
 def autenticar_gspread():
     try:
-        scope = [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, scope)
-        client = gspread.authorize(creds)
+        client = planilha.autenticar(CREDS_FILE)
         log.info("[GSHEETS] Autenticação realizada com sucesso.")
         return client
     except Exception as e:
         log.error(f"[GSHEETS] ERRO CRÍTICO ao autenticar: {e}")
         return None
 
-client = autenticar_gspread()
-if not client:
-    raise SystemExit("Não foi possível autenticar Google Sheets. Verifique creds.json.")
+def conectar_planilha():
+    """Abre a planilha (1x) e resolve as abas usadas pelo player."""
+    global abas, sheet_pedidos, sheet_horarios
+    client = autenticar_gspread()
+    if not client:
+        raise SystemExit("Não foi possível autenticar Google Sheets. Verifique creds.json.")
+    abas = planilha.registro_abas(SPREADSHEET_ID, CREDS_FILE)
+    sheet_pedidos = abas.aba("Playlist")
+    sheet_horarios = abas.aba("Horarios").com_prioridade(planilha.PRIORIDADE_BAIXA)
 
-sheet_pedidos = client.open_by_key(SPREADSHEET_ID).worksheet("Playlist")
-sheet_horarios = client.open_by_key(SPREADSHEET_ID).worksheet("Horarios")
+abas = None
+sheet_pedidos = None
+sheet_horarios = None
 
 # ===========================
 # VARIÁVEIS GLOBAIS
@@ -74,20 +120,24 @@ is_paused = False
 # itens da playlist: (linha, video_id, titulo, arquivo, nome_usuario, mensagem, status_msg)
 playlist = []
 
-download_queue = Queue()
+# download_queue: fila de downloads com prazo (ver AgendadorPrefetch)
 
 # cache por ID e por título (para retrocompatibilidade)
 cache_by_id = {}       # video_id -> caminho
 cache_by_title = {}    # titulo_normalizado -> caminho
+detalhes_by_id = {}    # video_id -> (titulo, duracao), para cache hit sem consultar nada
+chaves_by_path = {}    # caminho -> (video_id, titulo_normalizado), para desindexar sem varrer os índices
+lock_indices = threading.Lock()
+
+# metadados dos vídeos em disco (compartilhado com o back.py)
+cache_metadados = CacheMetadados()
 
-baixando_musicas = set()   # guarda video_ids em download
+baixando_musicas = {}      # video_id (ou link) na fila ou em download -> (seq do download, pedidos repetidos esperando)
 current_line = None
 current_title = ""
 current_video_id = None
-musica_rodando = False
 
-# controle de leitura da planilha
-ultima_linha_lida = 0
+# controle de leitura da planilha (ver CursorPlaylist)
 linha_fim_atual = None
 fim_da_lista = False
 linha_atual = 0
@@ -99,8 +149,7 @@ INTERVALO_ATUALIZACAO = 300  # 5 minutos
 ultimo_horario_fim = None
 avisou_fim = False
 
-# TTS
-proximo_tts_file = None
+# TTS (os anúncios das próximas músicas ficam no servico_tts)
 tts_fim_horario_file = None
 lock_tts = threading.Lock()
 
@@ -121,7 +170,17 @@ def monitorar_desempenho(intervalo_log=5, arquivo="logs.txt"):
             uso_cpu = processo.cpu_percent(interval=5.0)
             uso_mem = processo.memory_info().rss / (1024*1024)
             num_threads = processo.num_threads()
-            linha = f"CPU: {uso_cpu:.1f}% | Memória: {uso_mem:.1f} MB | Threads: {num_threads}"
+            sheets = planilha.estatisticas()
+            ativos, na_fila, ocupacao = utilizacao_downloads()
+            cache = gerenciador_cache.estatisticas()
+            linha = (f"CPU: {uso_cpu:.1f}% | Memória: {uso_mem:.1f} MB | Threads: {num_threads} | "
+                     f"Sheets: {sheets['chamadas']} chamadas, {sheets['limitadas']} limitadas, "
+                     f"{sheets['repetidas']} repetidas, {sheets['falhas']} falhas | "
+                     f"Downloads: {ativos}/{NUM_WORKERS_DOWNLOAD} ocupados, {na_fila} na fila, {ocupacao:.0f}% de uso | "
+                     f"Cache: {cache['total'] / 1024 ** 2:.0f}/{cache['quota'] / 1024 ** 2:.0f} MB, "
+                     f"{cache['taxa_acerto']:.0f}% de acerto, {cache['removidas']} removidas "
+                     f"({cache['bytes_removidos'] / 1024 ** 2:.0f} MB) | Codecs: {resumo_codecs()} | "
+                     f"Player: {motor.resumo_emendas()}")
             log.info(f"[MONITOR] {linha}")
             with open(arquivo, "a", encoding="utf-8") as f:
                 f.write(time.strftime("[%Y-%m-%d %H:%M:%S] ") + linha + "\n")
@@ -191,121 +250,314 @@ def pode_tocar():
 def _normalizar_titulo(nome: str) -> str:
     return ''.join(c for c in os.path.splitext(nome)[0] if c.isalnum() or c == ' ').strip()
 
-def _indexar_arquivo(path: str):
+EXTENSOES_AUDIO = (".mp3", ".m4a", ".aac", ".opus", ".wav", ".flac", ".ogg")
+
+def _interpretar_nome(path: str):
     """
-    Indexa 'path' nos caches:
+    (video_id, titulo_normalizado) a partir do nome do arquivo:
       - se nome contiver '__<id>' no final (antes da extensão), usa esse id;
-      - sempre indexa também por título normalizado (fallback).
-    """
-    base = os.path.basename(path)
-    nome, ext = os.path.splitext(base)
-    video_id = None
-    if "__" in nome:
-        # pega o sufixo depois de '__'
-        possible_id = nome.split("__")[-1]
-        if possible_id:
-            video_id = possible_id
+      - o título normalizado é o fallback (arquivos antigos sem id).
+    """
+    nome = os.path.splitext(os.path.basename(path))[0]
+    video_id = nome.split("__")[-1] if "__" in nome else None
+    return video_id or None, _normalizar_titulo(nome.split("__")[0])
+
+def _indexar(path, video_id, titulo, duracao=None):
+    titulo_norm = _normalizar_titulo(titulo or "")
+    with lock_indices:
+        if video_id:
             cache_by_id[video_id] = path
-    titulo_norm = _normalizar_titulo(nome.split("__")[0])
-    if titulo_norm:
-        cache_by_title[titulo_norm] = path
+            detalhes_by_id[video_id] = (titulo, duracao)
+        if titulo_norm:
+            cache_by_title[titulo_norm] = path
+        chaves_by_path[path] = (video_id, titulo_norm)
+
+def _indexar_arquivo(path: str, duracao=None, titulo=None):
+    """Indexa 'path' nos caches (por id e por título) e no manifesto, com o título real se conhecido."""
+    video_id, titulo_norm = _interpretar_nome(path)
+    _indexar(path, video_id, titulo or titulo_norm, duracao)
+    gerenciador_cache.registrar(path, video_id, titulo or titulo_norm, duracao)
+
+def _musicas_fixadas():
+    """
+    Arquivos que não podem sair do cache agora: playlist pronta, música atual, pedidos já na fila
+    e os prontos esperando a vez no ordem_playlist.
+    """
+    with lock_geral:
+        fixadas = {p[3] for p in playlist}
+    fixadas.update(ordem_playlist.arquivos())
+    for vid in [current_video_id] + download_queue.chaves():
+        if vid in cache_by_id:
+            fixadas.add(cache_by_id[vid])
+    return fixadas
+
+def _desindexar_arquivo(path: str):
+    """Tira dos índices um arquivo apagado pela limpeza do cache (roda na thread de limpeza)."""
+    with lock_indices:
+        video_id, titulo_norm = chaves_by_path.pop(path, (None, None))
+        if video_id and cache_by_id.get(video_id) == path:
+            del cache_by_id[video_id]
+            detalhes_by_id.pop(video_id, None)
+        if titulo_norm and cache_by_title.get(titulo_norm) == path:
+            del cache_by_title[titulo_norm]
+
+gerenciador_cache = GerenciadorCache(
+    DOWNLOADS_DIR, ARQUIVO_CACHE_MUSICAS, quota=QUOTA_CACHE_MUSICAS, politica=POLITICA_CACHE,
+    fixadas=_musicas_fixadas, ao_remover=_desindexar_arquivo,
+)
 
 def atualizar_cache_offline():
-    cache_by_id.clear()
-    cache_by_title.clear()
+    """Carrega os índices a partir do manifesto (só relê do disco as subpastas que mudaram)."""
+    with lock_indices:
+        cache_by_id.clear()
+        cache_by_title.clear()
+        detalhes_by_id.clear()
+        chaves_by_path.clear()
     log.info("[CACHE] Atualizando cache de músicas offline...")
-    for sub in os.listdir(DOWNLOADS_DIR):
-        pasta = os.path.join(DOWNLOADS_DIR, sub)
-        if os.path.isdir(pasta):
-            for f in os.listdir(pasta):
-                if not f.lower().endswith((".mp3", ".m4a", ".aac", ".opus", ".wav", ".flac", ".ogg")):
-                    continue
-                _indexar_arquivo(os.path.join(pasta, f))
-    log.info(f"[CACHE] Cache atualizado: {len(cache_by_id)} por ID, {len(cache_by_title)} por título.")
+    for caminho, video_id, titulo, duracao in gerenciador_cache.reconciliar(_interpretar_nome, EXTENSOES_AUDIO):
+        _indexar(caminho, video_id, titulo, duracao)
+    est = gerenciador_cache.estatisticas()
+    log.info(f"[CACHE] Cache atualizado: {len(cache_by_id)} por ID, {len(cache_by_title)} por título, "
+             f"{est['total'] / 1024 ** 2:.0f}/{est['quota'] / 1024 ** 2:.0f} MB.")
 
 def buscar_arquivo_offline(video_id: str, titulo: str):
     """
     Procura primeiro por video_id; se não achar, tenta por título normalizado (legado).
     """
-    if video_id and video_id in cache_by_id:
+    if video_id and video_id in cache_by_id and gerenciador_cache.conferir(cache_by_id[video_id]):
         return cache_by_id[video_id]
     tnorm = _normalizar_titulo(titulo or "")
-    if tnorm and tnorm in cache_by_title:
+    if tnorm and tnorm in cache_by_title and gerenciador_cache.conferir(cache_by_title[tnorm]):
         return cache_by_title[tnorm]
     return None
 
+FFPROBE = shutil.which("ffprobe")
+
+def verificar_download(caminho, duracao_esperada=None):
+    """
+    Confere um arquivo recém-baixado antes de indexar: existe, não é temporário, tem o tamanho
+    mínimo e, se o ffprobe existir, dura pelo menos TOLERANCIA_DURACAO do vídeo. Devolve (ok, motivo).
+    """
+    if not caminho or not os.path.isfile(caminho):
+        return False, "arquivo não encontrado"
+    if eh_temporario(os.path.basename(caminho)):
+        return False, "arquivo temporário"
+    tamanho = os.path.getsize(caminho)
+    if tamanho < TAMANHO_MINIMO:
+        return False, f"só {tamanho} bytes"
+    if duracao_esperada and FFPROBE:
+        try:
+            r = subprocess.run(
+                [FFPROBE, "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", caminho],
+                capture_output=True, text=True, timeout=30,
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            log.warning(f"[DOWNLOAD] ffprobe indisponível ({e}). Conferindo só o tamanho.")
+            return True, "OK"
+        if r.returncode != 0:
+            return False, f"ffprobe não leu o arquivo: {r.stderr.strip()[:200]}"
+        try:
+            duracao = float(r.stdout.strip())
+        except ValueError:
+            return True, "OK"  # contêiner sem duração no cabeçalho: fica só com o tamanho
+        if duracao < duracao_esperada * TOLERANCIA_DURACAO:
+            return False, f"{duracao:.0f}s de {duracao_esperada:.0f}s (truncado)"
+    return True, "OK"
+
 # ===========================
 # BUSCAR NOVAS MÚSICAS (Sheets)
 # ===========================
-def buscar_novas_musicas_worker():
-    global ultima_linha_lida, linha_fim_atual, fim_da_lista, linha_atual
-    while True:
-        try:
-            total_rows = len(sheet_pedidos.get_all_values())
-            inicio = ultima_linha_lida + 1
-            fim = min(ultima_linha_lida + LOTE_LEITURA, total_rows)
-
-            if inicio > fim:
-                time.sleep(INTERVALO_CHECK_NOVAS_MUSICAS)
-                continue
-
-            range_para_ler = f"C{inicio}:G{fim}"
-            dados = sheet_pedidos.get(range_para_ler)
-
-            if not dados:
-                time.sleep(INTERVALO_CHECK_NOVAS_MUSICAS)
-                continue
-
-            for i, row in enumerate(dados):
-                linha_atual = inicio + i
-
-                # Atualiza GUI com a linha atual
-                try:
-                    root.after(
-                        0,
-                        lambda la=linha_atual, lf=linha_fim_atual: linha_label.config(
-                            text=f"Linha atual: {la} | Linha Final: {lf}"
-                        ),
-                    )
-                except Exception:
-                    pass
-
-                name = row[0].strip() if len(row) > 0 else ""
-                message = row[1].strip() if len(row) > 1 else ""
-                link = row[2].strip() if len(row) > 2 else ""
-                status = row[3].strip() if len(row) > 3 else ""
-                status_msg = row[4].strip() if len(row) > 4 else ""
-
-                # Detecta fim da lista
-                if link == "":
-                    linha_fim_atual = linha_atual
-                    fim_da_lista = True
-                    log.info(f"[GSHEETS] Fim da lista detectado na linha {linha_atual}.")
-                    break
-
-                # Detecta novas músicas após o fim
-                if fim_da_lista:
-                    valores = sheet_pedidos.get_all_values()
-                    valores = [linha for linha in valores if any(c.strip() for c in linha)]
-                    nova_ultima = len(valores)
-                    if nova_ultima > (linha_fim_atual or 0):
-                        log.info(
-                            f"[GSHEETS] Novas músicas adicionadas ({nova_ultima - (linha_fim_atual or 0)}). Retomando execução."
-                        )
-                        fim_da_lista = False
-                        linha_fim_atual = None
-                        ultima_linha_lida = nova_ultima - 1
-                        break
-
-                # Processa pedido aceito
-                if status.upper() == "ACEITO":
-                    log.info(f"[GSHEETS] Pedido ACEITO na linha {linha_atual}. Enfileirando download.")
-                    download_queue.put((linha_atual, link, name, message, status_msg))
+def _digital(row):
+    """Identifica uma linha da Playlist mesmo se ela mudar de posição: carimbo (A) + link (E)."""
+    carimbo = row[0].strip() if len(row) > 0 else ""
+    link = row[4].strip() if len(row) > 4 else ""
+    return f"{carimbo}|{link}"
 
+class CursorPlaylist:
+    """
+    Leitura incremental da aba Playlist:
+    - lê só as linhas depois da última vista, em intervalos de LOTE_LEITURA (nada de get_all_values);
+    - cada leitura inclui a última linha lida e confere a 'digital' dela: se não bater, linhas foram
+      inseridas/apagadas acima e o cursor é reposicionado procurando numa janela em volta, sem reler do topo;
+    - salva em disco a posição segura para retomar (antes do 1º pedido enfileirado e ainda não tocado).
+    """
+    MAX_VISTAS = 1000
+
+    def __init__(self, arquivo=ARQUIVO_CURSOR):
+        self.arquivo = arquivo
+        self.linha = 1              # última linha lida (1 = cabeçalho)
+        self.digital = None         # digital da linha self.linha
+        self.fim_da_lista = False
+        self.vistas = OrderedDict() # digital -> linha (já processadas; evita enfileirar de novo)
+        self.pendentes = {}         # digital -> linha atual (enfileiradas e ainda não tocadas)
+        self._enfileiradas = {}     # linha com que o pedido foi enfileirado -> digital (para concluir)
+        self._lock = threading.Lock()
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.arquivo, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            self.linha = max(1, int(dados.get("linha", 1)))
+            self.digital = dados.get("digital")
+            log.info(f"[GSHEETS] Cursor da Playlist retomado na linha {self.linha}.")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning(f"[GSHEETS] Cursor da Playlist ignorado ({e}). Lendo do início.")
+
+    def _salvar(self):
+        # retoma antes do 1º pedido que ainda não tocou (a fila em memória se perde num reinício)
+        base = min([self.linha] + [l - 1 for l in self.pendentes.values()])
+        # de trás para frente: a posição relida por último vale mais que a de uma linha que já saiu da aba
+        digital = self.digital if base == self.linha else next(
+            (d for d, l in reversed(self.vistas.items()) if l == base), None)
+        try:
+            tmp = self.arquivo + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"linha": base, "digital": digital}, f)
+            os.replace(tmp, self.arquivo)
+        except OSError as e:
+            log.warning(f"[GSHEETS] Não foi possível salvar o cursor da Playlist: {e}")
+
+    def _deslocar(self, delta):
+        for d in self.vistas:
+            self.vistas[d] += delta
+        for d in self.pendentes:
+            self.pendentes[d] += delta
+
+    def _corrigir(self, d, linha):
+        """Linha já vista relida em outra posição: atualiza a posição guardada."""
+        self.vistas[d] = linha
+        self.vistas.move_to_end(d)
+        if d in self.pendentes:
+            self.pendentes[d] = linha
+
+    def _relocalizar(self, sheet):
+        """A linha do cursor mudou: procura a última linha conhecida numa janela em volta do cursor."""
+        ini = max(1, self.linha - JANELA_RELOCALIZAR)
+        rows = sheet.get(f"A{ini}:G{self.linha + JANELA_RELOCALIZAR}")
+        achou = None
+        for k, row in enumerate(rows, start=ini):
+            if _digital(row) == self.digital:
+                achou = k
+                break
+        if achou is not None:
+            self._deslocar(achou - self.linha)
+        else:
+            # a própria linha sumiu (ex.: back.py moveu as 'Tocado' para o Histórico):
+            # volta para a última linha já vista que ainda está na janela, deslocando as outras junto
+            conhecidas = [(k, self.vistas[_digital(row)]) for k, row in enumerate(rows, start=ini)
+                          if _digital(row) in self.vistas]
+            if conhecidas:
+                achou, antes = max(conhecidas)
+                self._deslocar(achou - antes)
             else:
-                # só avança o ponteiro se não deu break no loop
-                ultima_linha_lida += len(dados)
+                # nenhuma linha conhecida na janela (ex.: a aba encolheu mais que a janela ou foi
+                # esvaziada à noite): relê do topo; as já vistas são puladas e têm a posição corrigida
+                achou = 1
+        log.info(f"[GSHEETS] Playlist mudou acima do cursor: linha {self.linha} -> {achou}.")
+        self.linha = achou
+        self.digital = _digital(rows[achou - ini]) if 0 <= achou - ini < len(rows) else None
+
+    def ler(self, sheet):
+        """Lê o próximo lote. Devolve [(linha, row)] das linhas novas com link, em ordem."""
+        with self._lock:
+            ini = self.linha
+            rows = sheet.get(f"A{ini}:G{ini + LOTE_LEITURA}")  # 1ª = última linha lida (ou cabeçalho)
+            # sem linha nenhuma = cursor depois do fim da aba: também reposiciona (mesmo sem digital)
+            relocalizou = ini > 1 and (not rows or (self.digital and _digital(rows[0]) != self.digital))
+            if relocalizou:
+                self._relocalizar(sheet)
+                ini = self.linha
+                rows = sheet.get(f"A{ini}:G{ini + LOTE_LEITURA}")
+            rows = rows[1:]
+
+            novas = []
+            for k, row in enumerate(rows, start=ini + 1):
+                link = row[4].strip() if len(row) > 4 else ""
+                if not link:
+                    continue  # linha vazia/limpa no meio da aba
+                d = _digital(row)
+                if d in self.vistas:
+                    if self.vistas[d] != k:
+                        self._corrigir(d, k)
+                    continue
+                self.vistas[d] = k
+                novas.append((k, row))
+            while len(self.vistas) > self.MAX_VISTAS:
+                self.vistas.popitem(last=False)
+
+            if rows:
+                self.linha = ini + len(rows)
+                self.digital = _digital(rows[-1])
+            self.fim_da_lista = len(rows) < LOTE_LEITURA
+            if rows or relocalizou:
+                self._salvar()
+            return novas
+
+    def enfileirada(self, linha, row):
+        with self._lock:
+            d = _digital(row)
+            self.pendentes[d] = linha
+            self._enfileiradas[linha] = d
+
+    def concluir(self, linha):
+        """Pedido tocado ou que não vai tocar (download falhou): deixa de segurar a posição salva."""
+        with self._lock:
+            d = self._enfileiradas.pop(linha, None)
+            if d is not None and self.pendentes.pop(d, None) is not None:
+                self._salvar()
+
+cursor_playlist = CursorPlaylist()
+
+def ler_novas_musicas():
+    """
+    Um ciclo de leitura da aba Playlist: enfileira os pedidos ACEITO do próximo lote.
+    Devolve True se ainda há linhas para ler (o worker não precisa esperar).
+    """
+    global linha_fim_atual, fim_da_lista, linha_atual
+    novas = cursor_playlist.ler(sheet_pedidos.com_prioridade(planilha.PRIORIDADE_BAIXA))
+
+    for linha, row in novas:
+        name = row[2].strip() if len(row) > 2 else ""
+        message = row[3].strip() if len(row) > 3 else ""
+        link = row[4].strip() if len(row) > 4 else ""
+        status = row[5].strip() if len(row) > 5 else ""
+        status_msg = row[6].strip() if len(row) > 6 else ""
+
+        # Processa pedido aceito
+        if status.upper() == "ACEITO":
+            # marca antes: um download que falha logo já libera a linha (concluir)
+            cursor_playlist.enfileirada(linha, row)
+            if not enfileirar_download(linha, link, name, message, status_msg):
+                cursor_playlist.concluir(linha)
+
+    linha_atual = cursor_playlist.linha
+    if cursor_playlist.fim_da_lista and not fim_da_lista:
+        log.info(f"[GSHEETS] Fim da lista detectado na linha {linha_atual}.")
+    elif fim_da_lista and novas:
+        log.info(f"[GSHEETS] Novas músicas adicionadas ({len(novas)}). Retomando execução.")
+    fim_da_lista = cursor_playlist.fim_da_lista
+    linha_fim_atual = linha_atual if fim_da_lista else None
+
+    # Atualiza GUI com a linha atual
+    try:
+        root.after(
+            0,
+            lambda la=linha_atual, lf=linha_fim_atual: linha_label.config(
+                text=f"Linha atual: {la} | Linha Final: {lf}"
+            ),
+        )
+    except Exception:
+        pass
+    return not fim_da_lista
 
+def buscar_novas_musicas_worker():
+    while True:
+        try:
+            if ler_novas_musicas():
+                continue  # ainda há linhas: lê o próximo lote já
         except Exception as e:
             log.error(f"[GSHEETS] ERRO ao buscar novas músicas: {e}. Tentando novamente em 5 minutos.")
             time.sleep(300)
@@ -313,374 +565,1148 @@ def buscar_novas_musicas_worker():
         time.sleep(INTERVALO_CHECK_NOVAS_MUSICAS)
 
 # ===========================
-# DOWNLOAD WORKER (apenas 1)
+# DOWNLOAD WORKERS (pool)
 # ===========================
-def download_worker():
-    while True:
-        item = download_queue.get()
-        video_id = None
-        titulo_real = None
-        try:
-            if not item or len(item) < 5:
-                download_queue.task_done()
-                continue
+class OrdemPlaylist:
+    """
+    Cada pedido enfileirado recebe um número de sequência (ordem da planilha) e só entra
+    na playlist depois de todos os anteriores, mesmo que os downloads terminem fora de ordem.
+    Um pedido que falha libera a vez; um que passa de ESPERA_MAX_ORDEM seg baixando (contados de
+    quando um worker pegou o download, não de quando entrou na fila) deixa os prontos passarem
+    na frente e entra quando terminar.
+    """
+    def __init__(self):
+        self._seq = itertools.count()
+        self._proximo = 0
+        self._reservados = {}   # seq -> momento em que um worker começou o download (None = ainda na fila)
+        self._junto = {}        # seq de um pedido repetido -> seq do download que ele aproveita
+        self._prontos = {}      # seq -> item da playlist (None = falhou)
+        self._atrasados = set()
+        self._lock = threading.Lock()
+
+    def reservar(self):
+        with self._lock:
+            seq = next(self._seq)
+            self._reservados[seq] = None
+            return seq
+
+    def iniciar(self, seq):
+        """Um worker começou o download do pedido: a partir daqui conta o ESPERA_MAX_ORDEM."""
+        with self._lock:
+            if seq in self._reservados and self._reservados[seq] is None:
+                self._reservados[seq] = time.time()
+
+    def vincular(self, seq, seq_download):
+        """Pedido repetido: o prazo dele é o do download que ele aproveita."""
+        with self._lock:
+            if seq in self._reservados:
+                self._junto[seq] = seq_download
+
+    def _esquecer(self, seq):
+        self._reservados.pop(seq, None)
+        self._junto.pop(seq, None)
+
+    def concluir(self, seq, item):
+        with self._lock:
+            if seq in self._atrasados:
+                self._atrasados.discard(seq)
+                self._esquecer(seq)
+                if item:
+                    self._inserir(item)
+                return
+            self._prontos[seq] = item
+            self._liberar()
+
+    def liberar(self):
+        with self._lock:
+            self._liberar()
+
+    def arquivos(self):
+        """Arquivos dos pedidos prontos que ainda esperam um anterior para entrar na playlist."""
+        with self._lock:
+            return {item[3] for item in self._prontos.values() if item}
+
+    def _liberar(self):
+        while True:
+            if self._proximo in self._prontos:
+                item = self._prontos.pop(self._proximo)
+                self._esquecer(self._proximo)
+                if item:
+                    self._inserir(item)
+            elif self._prontos and self._baixando_ha(self._proximo) > ESPERA_MAX_ORDEM:
+                log.warning(f"[DOWNLOAD] Pedido #{self._proximo} demorando demais. Liberando os seguintes.")
+                self._atrasados.add(self._proximo)
+            else:
+                return
+            self._proximo += 1
+
+    def _baixando_ha(self, seq):
+        """Seg desde que o download do pedido começou (0 se ainda está na fila)."""
+        inicio = self._reservados.get(self._junto.get(seq, seq))
+        return time.time() - inicio if inicio else 0
 
-            linha, link, nome_usuario, mensagem, status_msg = item
-            titulo_real = "Desconhecido"
+    def _inserir(self, item):
+        with lock_geral:
+            playlist.append(item)
+        motor.acordar()
+
+ordem_playlist = OrdemPlaylist()
+
+def tempo_restante_atual():
+    """Seg que faltam para acabar a música atual (0 se nada tocando)."""
+    try:
+        if player and player.get_length() > 0:
+            return max(0.0, (player.get_length() - max(player.get_time(), 0)) / 1000.0)
+    except Exception:
+        pass
+    return 0.0
+
+class AgendadorPrefetch:
+    """
+    Fila de downloads por prazo, no lugar do FIFO:
+    prazo de um pedido = agora + resto da música atual + duração de tudo que toca antes dele
+    (playlist pronta + pedidos anteriores ainda na fila/baixando).
+    Os workers pegam sempre o prazo mais próximo, mas só se ele estiver entre as PREFETCH_K
+    próximas músicas ou tocar dentro de ANTECEDENCIA_PREFETCH seg; o resto espera a vez,
+    sem baixar a fila inteira de uma vez. Pedidos já no cache passam direto.
+    """
+    REAVALIAR = 5  # seg: o prazo anda com o tempo de reprodução
+
+    def __init__(self):
+        self._pendentes = {}     # seq -> item
+        self._andamento = {}     # seq -> video_id, sendo baixados
+        self._duracoes = {}      # video_id -> seg
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        seq, chave = item[0], item[1]
+        meta = cache_metadados.obter(chave) if chave not in self._duracoes else None
+        with self._cond:
+            if meta and meta.get("duration"):
+                self._duracoes[chave] = meta["duration"]
+            self._pendentes[seq] = item
+            self._cond.notify_all()
+
+    def registrar_duracao(self, video_id, duracao):
+        if video_id and duracao:
+            with self._cond:
+                self._duracoes[video_id] = duracao
+
+    def _duracao(self, video_id):
+        return self._duracoes.get(video_id) or DURACAO_PADRAO
+
+    def _escolher(self):
+        """(seq, prazo em seg a partir de agora) do próximo a baixar, ou (None, None) se ninguém pode ainda."""
+        if not self._pendentes:
+            return None, None
+        with lock_geral:
+            prontas = [p[1] for p in playlist]
+        for seq, item in self._pendentes.items():
+            if item[1] in cache_by_id:
+                return seq, 0.0  # já baixado: não gasta banda, só entra na ordem
+        seq = min(self._pendentes)  # prazo cresce com a ordem da planilha: o menor seq é o mais urgente
+        antes = [v for s, v in self._andamento.items() if s < seq]
+        a_frente = len(prontas) + len(antes)
+        prazo = tempo_restante_atual() + sum(self._duracao(v) for v in prontas + antes)
+        if a_frente < PREFETCH_K or prazo <= ANTECEDENCIA_PREFETCH:
+            return seq, prazo
+        return None, prazo
+
+    def get(self, timeout=None):
+        fim = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                seq, prazo = self._escolher()
+                if seq is not None:
+                    item = self._pendentes.pop(seq)
+                    self._andamento[seq] = item[1]
+                    if prazo:
+                        log.info(f"[DOWNLOAD] Prefetch do pedido #{seq} (toca em ~{prazo:.0f}s).")
+                    return item
+                espera = self.REAVALIAR if fim is None else min(self.REAVALIAR, fim - time.time())
+                if espera <= 0:
+                    raise Empty
+                self._cond.wait(timeout=espera)
+
+    def task_done(self, item):
+        with self._cond:
+            self._andamento.pop(item[0], None)
+            self._cond.notify_all()
+
+    def acordar(self):
+        """Reavalia os prazos já (ex.: uma música saiu da playlist)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def qsize(self):
+        with self._cond:
+            return len(self._pendentes)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def limpar(self):
+        with self._cond:
+            self._pendentes.clear()
+
+    def chaves(self):
+        """video_ids (ou links) na fila ou baixando."""
+        with self._cond:
+            return [i[1] for i in self._pendentes.values()] + list(self._andamento.values())
+
+download_queue = AgendadorPrefetch()
+
+def enfileirar_download(linha, link, nome_usuario, mensagem, status_msg):
+    """
+    Enfileira o pedido. Se o mesmo vídeo já está na fila/em download, não baixa de novo:
+    o pedido espera esse download e entra na playlist com a própria linha e mensagem. Devolve True.
+    """
+    chave = extrair_video_id(link) or link.strip()
+    seq = ordem_playlist.reservar()
+    with lock_geral:
+        seq_download, repetidos = baixando_musicas.get(chave) or (None, None)
+        if repetidos is not None:
+            repetidos.append((seq, linha, nome_usuario, mensagem, status_msg))
+        else:
+            baixando_musicas[chave] = (seq, [])
+    if repetidos is not None:
+        ordem_playlist.vincular(seq, seq_download)
+        log.info(f"[DOWNLOAD] Linha {linha}: vídeo {chave} já está na fila. Aproveitando o mesmo download.")
+        return True
+    download_queue.put((seq, chave, linha, link, nome_usuario, mensagem, status_msg))
+    return True
+
+# utilização do pool (para o monitor)
+_lock_pool = threading.Lock()
+_downloads_ativos = {}       # thread -> início do item atual
+_tempo_ocupado = 0.0         # seg ocupados (itens concluídos) desde a última leitura
+_utilizacao_lida_em = time.time()
+
+def _marcar_ocupado(ocupado):
+    global _tempo_ocupado
+    nome = threading.current_thread().name
+    with _lock_pool:
+        if ocupado:
+            _downloads_ativos[nome] = time.time()
+        else:
+            inicio = _downloads_ativos.pop(nome, None)
+            if inicio:
+                _tempo_ocupado += time.time() - max(inicio, _utilizacao_lida_em)
+
+def utilizacao_downloads():
+    """(workers ocupados, itens na fila, % de ocupação do pool desde a última chamada)."""
+    global _tempo_ocupado, _utilizacao_lida_em
+    with _lock_pool:
+        agora = time.time()
+        ocupado = _tempo_ocupado + sum(agora - max(i, _utilizacao_lida_em) for i in _downloads_ativos.values())
+        janela = max(agora - _utilizacao_lida_em, 1e-6) * NUM_WORKERS_DOWNLOAD
+        ativos = len(_downloads_ativos)
+        _tempo_ocupado = 0.0
+        _utilizacao_lida_em = agora
+    return ativos, download_queue.qsize(), min(100.0, 100.0 * ocupado / janela)
+
+# info completo do yt_dlp dos downloads que falharam (em memória: as URLs de stream expiram);
+# a próxima tentativa do mesmo vídeo baixa direto, sem extrair o link de novo
+_infos_resolvidos = {}   # video_id -> (info, momento)
+_lock_infos = threading.Lock()
+
+def _info_resolvido(video_id):
+    with _lock_infos:
+        salvo = _infos_resolvidos.get(video_id)
+        if salvo and time.time() - salvo[1] < TTL_INFO_RESOLVIDO:
+            return salvo[0]
+        _infos_resolvidos.pop(video_id, None)
+        return None
 
-            # 1) Extrai metadados SEM baixar (id + título)
+def _guardar_info(video_id, info):
+    with _lock_infos:
+        agora = time.time()
+        for vid in [v for v, (_, t) in _infos_resolvidos.items() if agora - t >= TTL_INFO_RESOLVIDO]:
+            del _infos_resolvidos[vid]
+        if info is None:
+            _infos_resolvidos.pop(video_id, None)
+        elif video_id:
+            _infos_resolvidos[video_id] = (info, agora)
+
+def _arquivo_baixado(resultado, pasta, base):
+    """
+    Caminho final (depois dos pós-processadores) informado pelo yt_dlp. Se não vier (ou não existir),
+    procura '<base>.*' na pasta: o FFmpegExtractAudio troca a extensão (ex.: webm -> opus).
+    """
+    informados = [req.get('filepath') for req in reversed((resultado or {}).get('requested_downloads') or [])]
+    informados.append((resultado or {}).get('filepath'))
+    for caminho in informados:
+        if caminho and os.path.exists(caminho):
+            return caminho
+    try:
+        candidatos = [os.path.join(pasta, n) for n in os.listdir(pasta)
+                      if n.startswith(base + ".") and not eh_temporario(n)]
+    except OSError:
+        candidatos = []
+    if candidatos:
+        return max(candidatos, key=os.path.getmtime)
+    return next((c for c in informados if c), os.path.join(pasta, base))
+
+def _pos_processador_audio():
+    """
+    nativo: FFmpegExtractAudio com 'best' não recodifica: m4a/opus/ogg ficam como vieram
+            e o webm (opus) só troca de contêiner para .opus (-acodec copy);
+    mp3:    comportamento antigo, recodifica para mp3 96 kbps.
+    """
+    if MODO_ARMAZENAMENTO == "mp3":
+        return {'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '96'}
+    return {'key': 'FFmpegExtractAudio', 'preferredcodec': 'best'}
+
+# tamanho / CPU por codec (para comparar os modos de armazenamento)
+_estatisticas_codec = {}   # codec -> {'arquivos', 'bytes', 'cpu'}
+_lock_codec = threading.Lock()
+
+def _cpu_agora():
+    # CPU desta thread + dos processos filhos (ffmpeg) já encerrados; com vários workers
+    # o ffmpeg de um pode cair na conta do outro, mas a média por codec continua útil
+    t = os.times()
+    return time.thread_time() + t.children_user + t.children_system
+
+def registrar_codec(caminho, cpu):
+    codec = os.path.splitext(caminho)[1].lstrip(".").lower() or "?"
+    try:
+        tamanho = os.path.getsize(caminho)
+    except OSError:
+        tamanho = 0
+    with _lock_codec:
+        est = _estatisticas_codec.setdefault(codec, {'arquivos': 0, 'bytes': 0, 'cpu': 0.0})
+        est['arquivos'] += 1
+        est['bytes'] += tamanho
+        est['cpu'] += max(cpu, 0.0)
+    log.info(f"[DOWNLOAD] {codec}: {tamanho / 1024 ** 2:.1f} MB, {cpu:.2f}s de CPU até ficar pronto.")
+
+def resumo_codecs():
+    """'opus 12 (3.1 MB, 0.05s CPU/música), mp3 3 (...)' para o monitor."""
+    with _lock_codec:
+        itens = sorted(_estatisticas_codec.items(), key=lambda kv: -kv[1]['arquivos'])
+        return ", ".join(
+            f"{codec} {e['arquivos']} ({e['bytes'] / e['arquivos'] / 1024 ** 2:.1f} MB, "
+            f"{e['cpu'] / e['arquivos']:.2f}s CPU/música)"
+            for codec, e in itens
+        ) or "nenhum download"
+
+def baixar_pedido(link, nome_usuario, mensagem, status_msg, linha, preaquecimento=False):
+    """
+    Resolve metadados, procura no cache e baixa se preciso. Devolve o item da playlist ou None.
+    O link é resolvido no máximo 1x: o download sai do mesmo info (process_ie_result). Se o download
+    falhar, o info fica guardado por TTL_INFO_RESOLVIDO seg e a repetição do pedido (download_worker)
+    não extrai de novo.
+    preaquecimento: usa LIMITE_BANDA_PREAQUECIMENTO e não conta nas estatísticas de acerto do cache.
+    """
+    id_link = extrair_video_id(link)
+    video_id = id_link
+    titulo_real = "Desconhecido"
+    inicio = time.time()
+
+    # 0) Caminho rápido: id tirado da própria URL -> arquivo no cache, sem rede (só 1 stat para conferir o arquivo)
+    arquivo_existente = cache_by_id.get(id_link) if id_link else None
+    if arquivo_existente and gerenciador_cache.conferir(arquivo_existente):
+        titulo_real, duracao = detalhes_by_id.get(id_link) or (titulo_real, None)
+        download_queue.registrar_duracao(id_link, duracao)
+        log.info(f"[DOWNLOAD] Cache hit: '{titulo_real}' (id={id_link}). Adicionando à playlist.")
+        gerenciador_cache.contar(acerto=True, ignorar=preaquecimento)
+        return (linha, id_link, titulo_real, arquivo_existente, nome_usuario, mensagem, status_msg)
+
+    # 1) Metadados (id + título) do cache em disco: cache hit sem nenhuma chamada de rede
+    meta = cache_metadados.obter(id_link)
+    if meta:
+        video_id = meta.get('id') or id_link
+        titulo_real = meta.get('title') or 'Desconhecido'
+        download_queue.registrar_duracao(video_id, meta.get('duration'))
+        arquivo_existente = buscar_arquivo_offline(video_id, titulo_real)
+        if arquivo_existente:
+            log.info(f"[DOWNLOAD] Cache hit: '{titulo_real}' (id={video_id}). Adicionando à playlist.")
+            gerenciador_cache.contar(acerto=True, ignorar=preaquecimento)
+            return (linha, video_id, titulo_real, arquivo_existente, nome_usuario, mensagem, status_msg)
+
+    ydl_opts_download = {
+        'format': 'bestaudio[abr<=96]/bestaudio',
+        'quiet': True,
+        'socket_timeout': 30,
+        # grava em <arquivo>.part e renomeia no fim (o ffmpeg também usa .temp + rename):
+        # o arquivo final nunca aparece pela metade, e um .part interrompido é retomado
+        'continuedl': True,
+        'nopart': False,
+        'retries': 10,
+        'extractor_args': {'youtube': {'skip': ['dash', 'hls']}},
+        'postprocessors': [_pos_processador_audio()]
+    }
+    limite_banda = LIMITE_BANDA_PREAQUECIMENTO if preaquecimento else LIMITE_BANDA_WORKER
+    if limite_banda:
+        ydl_opts_download['ratelimit'] = limite_banda
+
+    with yt_dlp.YoutubeDL(ydl_opts_download) as ydl:
+        # 2) Resolve o link (1x): info guardado de uma tentativa anterior ou extract_info sem baixar
+        info = _info_resolvido(video_id)
+        reaproveitado = info is not None
+        if info is None:
             try:
-                ydl_opts_info = {
-                    'quiet': True,
-                    'skip_download': True,
-                    'extractor_args': {'youtube': {'skip': ['dash', 'hls']}}
-                }
-                with yt_dlp.YoutubeDL(ydl_opts_info) as ydl:
-                    info = ydl.extract_info(link, download=False)
-                    video_id = info.get('id') or info.get('webpage_url_basename')
-                    titulo_real = info.get('title', 'Desconhecido')
+                info = ydl.extract_info(link, download=False)
             except Exception as e:
-                log.warning(f"[DOWNLOAD] Não foi possível extrair info do link: {e}")
-
-            # 2) Tenta HIT no cache (id -> título)
+                log.error(f"[DOWNLOAD] Não foi possível extrair info do link '{link}': {e}")
+                return None
+            cache_metadados.salvar(id_link or info.get('id'), info)
+        video_id = info.get('id') or info.get('webpage_url_basename') or video_id
+        titulo_real = info.get('title', 'Desconhecido')
+        download_queue.registrar_duracao(video_id, info.get('duration'))
+
+        # 3) Tenta HIT no cache (id -> título) agora que o id/título são conhecidos
+        if not meta:
             arquivo_existente = buscar_arquivo_offline(video_id, titulo_real)
             if arquivo_existente:
                 log.info(f"[DOWNLOAD] Cache hit: '{titulo_real}' (id={video_id}). Adicionando à playlist.")
-                with lock_geral:
-                    playlist.append((linha, video_id, titulo_real, arquivo_existente, nome_usuario, mensagem, status_msg))
-                download_queue.task_done()
-                continue
-
-            # 3) Evita downloads duplicados (por video_id)
-            if video_id:
-                with lock_geral:
-                    if video_id in baixando_musicas:
-                        log.info(f"[DOWNLOAD] '{titulo_real}' (id={video_id}) já está em download. Ignorando duplicata.")
-                        download_queue.task_done()
-                        continue
-                    baixando_musicas.add(video_id)
-
-            # 4) Prepara caminho de saída
-            titulo_norm = _normalizar_titulo(titulo_real or "desconhecido")
-            subpasta = titulo_norm[0].upper() if titulo_norm else '_'
-            pasta = os.path.join(DOWNLOADS_DIR, subpasta)
-            os.makedirs(pasta, exist_ok=True)
-
-            # Nomeia com __<video_id> para facilitar reindexação posterior
-            arquivo_base = f"{titulo_norm}__{video_id}" if video_id else f"{titulo_norm}"
-            output_template = os.path.join(pasta, f"{arquivo_base}.%(ext)s")
-
-            ydl_opts_download = {
-                'format': 'bestaudio[abr<=96]/bestaudio',
-                'outtmpl': output_template,
-                'quiet': True,
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '96'
-                }]
-            }
-
-            # 5) Baixa
-            log.info(f"[DOWNLOAD] Iniciando download: '{titulo_real}' (id={video_id})")
+                gerenciador_cache.contar(acerto=True, ignorar=preaquecimento)
+                return (linha, video_id, titulo_real, arquivo_existente, nome_usuario, mensagem, status_msg)
+        gerenciador_cache.contar(acerto=False, ignorar=preaquecimento)
+
+        # 4) Prepara caminho de saída
+        titulo_norm = _normalizar_titulo(titulo_real or "desconhecido")
+        subpasta = titulo_norm[0].upper() if titulo_norm else '_'
+        pasta = os.path.join(DOWNLOADS_DIR, subpasta)
+        os.makedirs(pasta, exist_ok=True)
+
+        # Nomeia com __<video_id> para facilitar reindexação posterior
+        arquivo_base = f"{titulo_norm}__{video_id}" if video_id else f"{titulo_norm}"
+        ydl.params['outtmpl'] = {'default': os.path.join(pasta, f"{arquivo_base}.%(ext)s")}
+
+        # 5) Baixa a partir do info já resolvido (sem extrair de novo)
+        log.info(f"[DOWNLOAD] Iniciando download: '{titulo_real}' (id={video_id})")
+        cpu_inicio = _cpu_agora()
+        for tentativa in range(1, TENTATIVAS_DOWNLOAD + 1):
             try:
-                with yt_dlp.YoutubeDL(ydl_opts_download) as ydl:
-                    ydl.download([link])
-                arquivo_path_final = os.path.join(pasta, f"{arquivo_base}.mp3")
+                resultado = ydl.process_ie_result(dict(info), download=True)
+                arquivo_path_final = _arquivo_baixado(resultado, pasta, arquivo_base)
+                ok, motivo = verificar_download(arquivo_path_final, info.get('duration'))
+                if not ok:
+                    # apaga para a próxima tentativa baixar de novo (o yt_dlp pularia um arquivo já existente)
+                    try:
+                        os.remove(arquivo_path_final)
+                    except OSError:
+                        pass
+                    raise RuntimeError(f"arquivo inválido: {motivo}")
+                break
             except Exception as e:
-                log.error(f"[DOWNLOAD] ERRO no download de '{link}': {e}")
-                continue
-
-            # 6) Atualiza caches
-            _indexar_arquivo(arquivo_path_final)
-
-            # 7) Adiciona à playlist
-            with lock_geral:
-                playlist.append((linha, video_id, titulo_real, arquivo_path_final, nome_usuario, mensagem, status_msg))
-            log.info(f"[DOWNLOAD] Concluído: '{titulo_real}'. Adicionado à playlist.")
+                log.warning(f"[DOWNLOAD] Tentativa {tentativa}/{TENTATIVAS_DOWNLOAD} de '{titulo_real}' falhou: {e}")
+        else:
+            # info novo: guarda para a próxima tentativa; já reaproveitado e falhou de novo: as URLs
+            # podem ter vencido, a próxima tentativa resolve o link outra vez
+            _guardar_info(video_id, None if reaproveitado else info)
+            log.error(f"[DOWNLOAD] ERRO no download de '{link}'.")
+            return None
+        registrar_codec(arquivo_path_final, _cpu_agora() - cpu_inicio)
+
+    # 6) Atualiza caches
+    _guardar_info(video_id, None)
+    _indexar_arquivo(arquivo_path_final, info.get('duration'), titulo_real)
+    log.info(f"[DOWNLOAD] Concluído em {time.time() - inicio:.1f}s: '{titulo_real}'. Adicionado à playlist.")
+    return (linha, video_id, titulo_real, arquivo_path_final, nome_usuario, mensagem, status_msg)
 
+def download_worker():
+    while True:
+        try:
+            item = download_queue.get(timeout=10)
+        except Empty:
+            ordem_playlist.liberar()  # confere se algum download lento está segurando a fila
+            continue
+        seq, chave, linha, link, nome_usuario, mensagem, status_msg = item
+        resultado = None
+        ordem_playlist.iniciar(seq)
+        _marcar_ocupado(True)
+        try:
+            with _reservar_video(chave):
+                resultado = baixar_pedido(link, nome_usuario, mensagem, status_msg, linha)
         except Exception as e:
             log.error(f"[DOWNLOAD] ERRO no worker: {e}")
         finally:
-            if video_id:
-                with lock_geral:
-                    baixando_musicas.discard(video_id)
-            download_queue.task_done()
+            _marcar_ocupado(False)
+            if resultado or not _repetir_depois(item):
+                _concluir_download(item, resultado)
+            download_queue.task_done(item)
+
+_repeticoes = {}   # seq -> vezes que o pedido já voltou para a fila
+
+def _repetir_depois(item):
+    """
+    Download falhou: o pedido volta para a fila em ESPERA_REPETICAO seg, até REPETICOES_PEDIDO vezes
+    (baixar_pedido reaproveita o info guardado). Os pedidos repetidos do mesmo vídeo continuam esperando.
+    """
+    seq = item[0]
+    with lock_geral:
+        feitas = _repeticoes.get(seq, 0)
+        if feitas >= REPETICOES_PEDIDO:
+            return False
+        _repeticoes[seq] = feitas + 1
+    log.warning(f"[DOWNLOAD] Pedido #{seq} falhou. Nova tentativa ({feitas + 1}/{REPETICOES_PEDIDO}) "
+                f"em {ESPERA_REPETICAO}s.")
+    timer = threading.Timer(ESPERA_REPETICAO, download_queue.put, args=(item,))
+    timer.daemon = True
+    timer.start()
+    return True
+
+def _concluir_download(item, resultado):
+    """Entrega o resultado (None = falhou de vez) ao pedido e aos repetidos que esperavam o mesmo download."""
+    seq, chave, linha = item[:3]
+    ordem_playlist.concluir(seq, resultado)
+    if not resultado:
+        cursor_playlist.concluir(linha)  # não vai tocar: não segura mais a posição salva
+    if resultado:
+        antecipar_tts()  # música nova na playlist: anúncio já começa a ser sintetizado
+    with lock_geral:
+        _repeticoes.pop(seq, None)
+        _, repetidos = baixando_musicas.pop(chave, (None, []))
+    for seq_r, linha_r, nome_r, msg_r, status_r in repetidos:
+        item_r = None
+        if resultado:
+            item_r = (linha_r,) + tuple(resultado[1:4]) + (nome_r, msg_r, status_r)
+        ordem_playlist.concluir(seq_r, item_r)
+        if not item_r:
+            cursor_playlist.concluir(linha_r)
+
+# um mesmo vídeo nunca é baixado por duas threads ao mesmo tempo (mesmo .part)
+_cond_videos = threading.Condition()
+_videos_baixando = set()
+
+@contextmanager
+def _reservar_video(chave):
+    with _cond_videos:
+        while chave in _videos_baixando:
+            _cond_videos.wait()
+        _videos_baixando.add(chave)
+    try:
+        yield
+    finally:
+        with _cond_videos:
+            _videos_baixando.discard(chave)
+            _cond_videos.notify_all()
 
 # ===========================
-# TTS + MÚSICA + TTS FIM HORÁRIO
+# PRÉ-AQUECIMENTO DO CACHE (fora do horário)
 # ===========================
-def gerar_tts(texto, tag):
+def _dentro_do_horario():
+    """Como pode_tocar(), mas sem mexer no estado do aviso de fim de horário."""
+    agora = datetime.now(pytz.timezone("America/Sao_Paulo")).time()
+    for inicio, fim in horarios_cache:
+        if (inicio <= fim and inicio <= agora <= fim) or (inicio > fim and (agora >= inicio or agora <= fim)):
+            return True
+    return False
+
+def _fim_ultimo_horario():
+    """Quando terminou o último horário de reprodução (marca o período fora do horário atual); None se não há horários."""
+    agora = datetime.now(pytz.timezone("America/Sao_Paulo")).replace(tzinfo=None)
+    fins = []
+    for _, fim in horarios_cache:
+        momento = datetime.combine(agora.date(), fim)
+        fins.append(momento if momento <= agora else momento - timedelta(days=1))
+    return max(fins, default=None)
+
+def _links_para_preaquecer():
+    """Links em ordem de prioridade: pendentes da Playlist, da Moderação e os mais pedidos do Histórico."""
+    links = []
     try:
-        voz = random.choice(["pt-BR-ThalitaMultilingualNeural", "pt-BR-MacerioMultilingualNeural"])
-        temp_file = os.path.join(tempfile.gettempdir(), f"tts_{tag}_{int(time.time())}.mp3")
-        log.info(f"[TTS] Gerando áudio ({tag})...")
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        communicate = edge_tts.Communicate(texto, voice=voz, rate="-10%", volume="+30%")
-        loop.run_until_complete(communicate.save(temp_file))
-        loop.close()
-        log.info(f"[TTS] Áudio gerado: {temp_file}")
-        return temp_file
+        for row in sheet_pedidos.com_prioridade(planilha.PRIORIDADE_BAIXA).get("E2:F"):
+            if row and row[0].strip() and (len(row) < 2 or row[1].strip().lower() != "tocado"):
+                links.append(row[0].strip())
     except Exception as e:
-        log.error(f"[TTS] ERRO ao gerar áudio: {e}")
-        return None
+        log.warning(f"[PREAQUECER] Não foi possível ler a Playlist: {e}")
+    try:
+        links += [l.strip() for l in abas.aba("Moderação").com_prioridade(planilha.PRIORIDADE_BAIXA).col_values(5)[1:] if l.strip()]
+    except Exception as e:
+        log.warning(f"[PREAQUECER] Não foi possível ler a Moderação: {e}")
+    try:
+        historico = abas.aba("Historico").com_prioridade(planilha.PRIORIDADE_BAIXA).col_values(5)[1:]
+        contagem = Counter(extrair_video_id(l) or l.strip() for l in historico if l.strip())
+        primeiro_link = {}
+        for l in historico:
+            primeiro_link.setdefault(extrair_video_id(l) or l.strip(), l.strip())
+        links += [primeiro_link[v] for v, _ in contagem.most_common(TOP_HISTORICO)]
+    except Exception as e:
+        log.warning(f"[PREAQUECER] Não foi possível ler o Histórico: {e}")
+    return links
+
+def preaquecer_cache(orcamento=ORCAMENTO_PREAQUECIMENTO):
+    """Uma rodada: baixa (devagar) o que falta no cache, até 'orcamento' bytes e sem encher o cache. Devolve bytes baixados."""
+    baixados = ja_no_cache = falhas = 0
+    bytes_baixados = 0
+    vistos = set()
+    for link in _links_para_preaquecer():
+        chave = extrair_video_id(link) or link
+        if chave in vistos:
+            continue
+        vistos.add(chave)
+        if chave in cache_by_id:
+            ja_no_cache += 1
+            continue
+        if _dentro_do_horario():
+            log.info("[PREAQUECER] Começou um horário de reprodução. Parando.")
+            break
+        est = gerenciador_cache.estatisticas()
+        if bytes_baixados >= orcamento or est['total'] >= est['quota'] * OCUPACAO_MAX_PREAQUECIMENTO:
+            log.info("[PREAQUECER] Orçamento de disco atingido. Parando.")
+            break
+        with _reservar_video(chave):
+            item = baixar_pedido(link, "", "", "", None, preaquecimento=True)
+        if item and os.path.exists(item[3]):
+            baixados += 1
+            bytes_baixados += os.path.getsize(item[3])
+        elif not item:
+            falhas += 1
+    log.info(f"[PREAQUECER] Rodada concluída: {baixados} baixadas ({bytes_baixados / 1024 ** 2:.1f} MB), "
+             f"{ja_no_cache} já no cache, {falhas} falhas.")
+    return bytes_baixados
+
+def preaquecer_cache_worker():
+    gasto = 0         # bytes no período fora do horário atual
+    periodo = None    # fim do horário que abriu esse período
+    while True:
+        try:
+            if not _dentro_do_horario():
+                # orçamento novo a cada horário que termina, mesmo que o horário inteiro
+                # (ex.: um intervalo curto) tenha passado enquanto a thread dormia
+                fim = _fim_ultimo_horario()
+                if fim != periodo:
+                    periodo, gasto = fim, 0
+                if gasto < ORCAMENTO_PREAQUECIMENTO:
+                    gasto += preaquecer_cache(ORCAMENTO_PREAQUECIMENTO - gasto)
+        except Exception as e:
+            log.error(f"[PREAQUECER] ERRO: {e}")
+        time.sleep(INTERVALO_PREAQUECIMENTO)
 
-def preparar_proximo_tts():
-    global proximo_tts_file, playlist
-    with lock_geral:
-        if not playlist:
-            return
-        linha, vid, titulo, _, nome_usuario, mensagem, status_msg = playlist[0]
+# ===========================
+# TTS + MÚSICA + TTS FIM HORÁRIO
+# ===========================
+cache_tts = CacheTTS(PASTA_CACHE_TTS, TAMANHO_MAX_CACHE_TTS)
 
-    texto_tts = ""
-    if status_msg.lower() == "ler nome e mensagem":
-        texto_tts = f"A seguir, um pedido de {nome_usuario}, que disse: {mensagem}. Vem aí: {titulo}."
-    elif status_msg.lower() == "ler apenas o nome":
-        texto_tts = f"A seguir, {titulo}, um pedido do usuário {nome_usuario}."
-
-    if texto_tts:
-        tts_file_path = gerar_tts(texto_tts, f"linha{linha}")
-        with lock_tts:
-            # limpa TTS antigo
-            if proximo_tts_file and os.path.exists(proximo_tts_file):
+class ServicoTTS:
+    """
+    Um único event loop asyncio (thread própria) para todo o TTS, no lugar de um loop novo por anúncio:
+    - pedir(texto): agenda a síntese e devolve um Future (o mesmo texto pendente é reaproveitado);
+    - até TTS_SIMULTANEAS sínteses ao mesmo tempo;
+    - antecipar(textos): garante os anúncios das próximas músicas e cancela os que saíram da fila.
+    """
+    def __init__(self, cache, simultaneas=TTS_SIMULTANEAS):
+        self.cache = cache
+        self.simultaneas = simultaneas
+        self._loop = asyncio.new_event_loop()
+        self._semaforo = None
+        self._pendentes = {}       # texto -> concurrent.futures.Future
+        self._antecipados = set()  # textos pedidos pelo último antecipar()
+        self._em_uso = set()       # textos que alguém está esperando para tocar (não cancela)
+        self._lock = threading.RLock()
+        pronto = threading.Event()
+        threading.Thread(target=self._rodar, args=(pronto,), daemon=True, name="ServicoTTS").start()
+        pronto.wait()
+
+    def _rodar(self, pronto):
+        asyncio.set_event_loop(self._loop)
+        self._semaforo = asyncio.Semaphore(self.simultaneas)
+        self._loop.call_soon(pronto.set)
+        self._loop.run_forever()
+
+    async def _sintetizar(self, texto, tag):
+        async with self._semaforo:
+            arquivo = self.cache.obter(texto, VOZES_TTS, TTS_RATE, TTS_VOLUME)
+            if arquivo:
+                return arquivo
+            voz = random.choice(VOZES_TTS)
+            destino = self.cache.caminho(texto, voz, TTS_RATE, TTS_VOLUME)
+            temp_file = f"{destino}.{id(asyncio.current_task())}.tmp"
+            log.info(f"[TTS] Gerando áudio ({tag})...")
+            try:
+                communicate = edge_tts.Communicate(texto, voice=voz, rate=TTS_RATE, volume=TTS_VOLUME)
+                await communicate.save(temp_file)
+            except BaseException:
                 try:
-                    os.remove(proximo_tts_file)
+                    os.remove(temp_file)
                 except OSError:
                     pass
-            proximo_tts_file = tts_file_path
-            if tts_file_path:
-                log.info(f"[PLAYER] TTS da PRÓXIMA música preparado (linha {linha}).")
+                raise
+            self.cache.adicionar(temp_file, destino)
+            log.info(f"[TTS] Áudio gerado ({tag}): {destino}")
+            return destino
+
+    def _terminou(self, texto, fut):
+        with self._lock:
+            if self._pendentes.get(texto) is fut:
+                del self._pendentes[texto]
+        if not fut.cancelled() and fut.exception():
+            log.error(f"[TTS] ERRO ao gerar áudio: {fut.exception()}")
+
+    def pedir(self, texto, tag=""):
+        """Future com o caminho do anúncio. Acerto no cache já volta resolvido, sem passar pelo loop."""
+        with self._lock:
+            fut = self._pendentes.get(texto)
+            if fut and not fut.done():
+                return fut
+        arquivo = self.cache.obter(texto, VOZES_TTS, TTS_RATE, TTS_VOLUME)
+        if arquivo:
+            fut = concurrent.futures.Future()
+            fut.set_result(arquivo)
+            return fut
+        with self._lock:
+            fut = self._pendentes.get(texto)
+            if fut and not fut.done():
+                return fut
+            fut = asyncio.run_coroutine_threadsafe(self._sintetizar(texto, tag), self._loop)
+            self._pendentes[texto] = fut
+        fut.add_done_callback(lambda f, t=texto: self._terminou(t, f))
+        return fut
+
+    def reservar(self, texto, tag=""):
+        """Como pedir(), mas o antecipar() não cancela este anúncio até liberar(texto)."""
+        with self._lock:
+            self._em_uso.add(texto)
+        return self.pedir(texto, tag)
+
+    def liberar(self, texto):
+        with self._lock:
+            self._em_uso.discard(texto)
+
+    def antecipar(self, textos):
+        """Sintetiza (em paralelo) os anúncios da lista e cancela os antecipados que não estão mais nela."""
+        textos = [t for t in textos if t]
+        with self._lock:
+            for texto in self._antecipados - set(textos) - self._em_uso:
+                fut = self._pendentes.get(texto)
+                if fut and fut.cancel():
+                    log.info("[TTS] Anúncio antecipado cancelado (música saiu da fila).")
+            self._antecipados = set(textos)
+        for texto in textos:
+            self.pedir(texto, "antecipado")
+
+servico_tts = ServicoTTS(cache_tts)
+
+def texto_anuncio(item):
+    """Texto do anúncio de um item da playlist ('' se o pedido não pede leitura)."""
+    linha, vid, titulo, _, nome_usuario, mensagem, status_msg = item
+    if status_msg.lower() == "ler nome e mensagem":
+        return f"A seguir, um pedido de {nome_usuario}, que disse: {mensagem}. Vem aí: {titulo}."
+    if status_msg.lower() == "ler apenas o nome":
+        return f"A seguir, {titulo}, um pedido do usuário {nome_usuario}."
+    return ""
+
+def antecipar_tts():
+    """Mantém prontos os anúncios das próximas TTS_ANTECIPADOS músicas da playlist."""
+    with lock_geral:
+        proximas = playlist[:TTS_ANTECIPADOS]
+    servico_tts.antecipar([texto_anuncio(item) for item in proximas])
 
 def preparar_tts_fim_horario(horario_fim):
     """
-    Gera o TTS de aviso de fim de horário e guarda em tts_fim_horario_file.
-    Não gera se já existir arquivo pronto.
+    Pede ao servico_tts o aviso de fim de horário; quando ficar pronto vai para tts_fim_horario_file.
+    Não pede de novo se já existir arquivo pronto.
     """
-    global tts_fim_horario_file
     with lock_tts:
         if tts_fim_horario_file is not None:
             return  # já tem um preparado
 
-    texto = f"Horário limite alcançado, desligando player."
-    log.info("[PLAYER] Iniciando geração do TTS final (fim de horário) em background.")
-    tts_file = gerar_tts(texto, f"fim_{int(time.time())}")
-    if tts_file:
-        with lock_tts:
-            tts_fim_horario_file = tts_file
-        log.info(f"[PLAYER] TTS de fim de horário pré-gerado: {tts_file}")
-    else:
-        log.warning("[PLAYER] Falha ao gerar TTS de fim de horário.")
-
-def tocar_tts_final(arquivo):
-    """Toca o TTS final e tenta remover o arquivo ao fim."""
-    try:
-        if not arquivo or not os.path.exists(arquivo):
-            return
-        log.info("[PLAYER] Tocando TTS final (desligamento).")
-        tts_player = vlc.MediaPlayer(arquivo)
-        tts_player.play()
-        time.sleep(0.4)
-        while tts_player.get_state() not in [vlc.State.Ended, vlc.State.Stopped, vlc.State.Error]:
-            time.sleep(0.2)
-        try:
-            tts_player.stop()
-        except:
-            pass
+    def pronto(fut):
+        global tts_fim_horario_file
         try:
-            os.remove(arquivo)
-        except OSError as e:
-            log.warning(f"[PLAYER] Não foi possível remover arquivo TTS final: {e}")
-    except Exception as e:
-        log.error(f"[PLAYER] Erro ao tocar TTS final: {e}")
-
-def tocar_proxima_musica():
-    global player, musica_rodando, current_title, current_line, current_video_id, is_paused
-    global playlist, proximo_tts_file, tts_fim_horario_file, ultimo_horario_fim, avisou_fim
-
-    if musica_rodando or is_paused:
-        return
-    musica_rodando = True
-
-    # Atualiza cache de horários se estiver próximo do intervalo para garantir decisão correta
-    if time.time() - ultima_atualizacao > INTERVALO_ATUALIZACAO:
-        atualizar_horarios()
+            tts_file = fut.result()
+        except Exception:
+            tts_file = None
+        if tts_file:
+            with lock_tts:
+                tts_fim_horario_file = tts_file
+            log.info(f"[PLAYER] TTS de fim de horário pré-gerado: {tts_file}")
+        else:
+            log.warning("[PLAYER] Falha ao gerar TTS de fim de horário.")
 
-    if not pode_tocar():
-        # Se tem TTS final pré-gerado e ainda não avisou, toca o TTS de desligamento
-        with lock_tts:
-            ttf = tts_fim_horario_file
-            if ttf and not avisou_fim:
-                avisou_fim = True
-                tts_fim_horario_file = None
-                threading.Thread(target=tocar_tts_final, args=(ttf,), daemon=True, name="TocarTTFFinal").start()
+    servico_tts.pedir("Horário limite alcançado, desligando player.", "fim").add_done_callback(pronto)
 
-        log.info("[PLAYER] Fora do horário. Aguardando 60s...")
-        musica_rodando = False
-        root.after(60000, tocar_proxima_musica)
-        return
+# ===========================
+# MOTOR DE REPRODUÇÃO
+# ===========================
+OCIOSO, ANUNCIANDO, TOCANDO, TERMINOU = "ocioso", "anunciando", "tocando", "terminou"
 
-    proxima_musica = None
-    tts_para_tocar_agora = None
+class MotorReproducao:
+    """
+    Máquina de estados do player (ocioso -> anunciando -> tocando -> terminou -> ...) numa única thread:
+    - GUI e eventos do VLC só colocam comandos na fila (tocar, pausar, proxima, posicionar, fim, erro...);
+    - o fim do anúncio/música chega pelo evento do VLC, sem polling de get_state();
+    - sem música ou fora do horário, espera na própria fila com prazo (acordar() quando entra música nova);
+    - modo sem pausa (EMENDAR_FAIXAS): a próxima faixa fica carregada no player livre e começa
+      ANTECEDENCIA_EMENDA seg (ou CROSSFADE) antes do fim da atual, que termina sozinha.
+    """
+    def __init__(self):
+        self.estado = OCIOSO
+        self._comandos = Queue()
+        self._vlc = None          # Reprodutor: um vlc.Instance e dois players alternados para todas as faixas
+        self._midia = None        # arquivo da faixa ativa (anúncio ou música)
+        self._item = None         # item da playlist em andamento (None no aviso de fim de horário)
+        self._texto_tts = None    # anúncio reservado no servico_tts enquanto espera a síntese
+        self._t_tts = 0.0
+        self._prazo = None        # time.time() em que o comando "prazo" dispara (None = sem prazo)
+        self._emendar = False     # a próxima faixa entra emendada na atual (sem parar a atual)
+        self._emenda_em = None    # time.time() em que a próxima faixa começa (modo sem pausa)
+        self._crossfade = 0.0     # duração do crossfade da próxima emenda
+        self._fade = None         # (inicio, duracao) do crossfade em andamento
+        self._planilha = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="UpdSheet")
+
+    def iniciar(self):
+        self._vlc = Reprodutor(self.enviar)
+        threading.Thread(target=self._laco, daemon=True, name="Player").start()
+        self.enviar("tocar")
+
+    def enviar(self, comando, *args):
+        self._comandos.put((comando, args))
+
+    def acordar(self):
+        """Entrou música na playlist: se estiver parado esperando, tenta tocar agora."""
+        if self.estado == OCIOSO:
+            self.enviar("tocar")
+
+    def _laco(self):
+        while True:
+            espera = None if self._prazo is None else max(0.0, self._prazo - time.time())
+            try:
+                comando, args = self._comandos.get(timeout=espera)
+            except Empty:
+                self._prazo = None
+                comando, args = "prazo", ()
+            try:
+                getattr(self, f"_cmd_{comando}")(*args)
+            except Exception as e:
+                log.error(f"[PLAYER] ERRO no comando '{comando}' ({self.estado}): {e}")
+                self._parar_midia()
+                self._ocioso(1)
+
+    # ---------- transições ----------
+    def _ocioso(self, segundos):
+        self.estado = OCIOSO
+        self._item = None
+        self._emendar = False
+        self._prazo = time.time() + segundos
+
+    def _mostrar(self, titulo=None, status=None):
+        try:
+            if titulo is not None:
+                root.after(0, lambda: titulo_label.config(text=titulo))
+            if status is not None:
+                root.after(0, lambda: status_label.config(text=status))
+        except Exception:
+            pass
 
-    with lock_geral:
-        if playlist:
-            proxima_musica = playlist.pop(0)
+    @property
+    def _geracao(self):
+        """Muda a cada troca/parada de faixa: descarta eventos do VLC e anúncios atrasados."""
+        return self._vlc.geracao
+
+    def _abrir(self, arquivo):
+        """Troca a faixa ativa (no player livre); o fim (ou erro) volta como comando com a geração dela."""
+        self._soltar_tts()
+        self._prazo = None
+        volume = 100
+        if self._emendar and self._crossfade:
+            volume = 0
+            self._fade = (time.time(), self._crossfade)
+        self._crossfade = 0.0
+        self._vlc.abrir(arquivo, emendar=self._emendar, volume=volume)
+        self._emendar = False
+        self._midia = arquivo
+        self._agendar()
+        return self._vlc.player
+
+    def _parar_midia(self):
+        global player
+        self._prazo = None
+        self._emendar = False
+        self._emenda_em = None
+        self._fade = None
+        self._soltar_tts()
+        self._vlc.parar()
+        self._midia = None
+        player = None
+
+    def _largar_midia(self):
+        """Como _parar_midia, mas a faixa atual termina sozinha e a próxima entra emendada nela."""
+        global player
+        self._prazo = None
+        self._emenda_em = None
+        self._fade = None
+        self._soltar_tts()
+        self._vlc.soltar()
+        self._emendar = True
+        self._midia = None
+        player = None
+
+    def _soltar_tts(self):
+        if self._texto_tts:
+            servico_tts.liberar(self._texto_tts)
+            self._texto_tts = None
+
+    def _anunciar(self):
+        """Estado ANUNCIANDO: espera o anúncio (sem bloquear a fila) ou vai direto para a música."""
+        texto = texto_anuncio(self._item)
+        if not texto:
+            return self._tocar_musica()
+        self.estado = ANUNCIANDO
+        self._texto_tts = texto
+        self._t_tts = time.time()
+        fut = servico_tts.reservar(texto, f"linha{current_line}")
+        if fut.done():
+            return self._cmd_anuncio_pronto(self._geracao, fut)
+        geracao = self._geracao
+        fut.add_done_callback(lambda f: self.enviar("anuncio_pronto", geracao, f))
+        self._prazo = time.time() + TIMEOUT_TTS
+
+    def _tocar_musica(self):
+        global player
+        arquivo = self._item[3]
+        log.info(f"[PLAYER] Tocando arquivo: {arquivo}")
+        gerenciador_cache.tocou(arquivo)
+        player = self._abrir(arquivo)
+        self.estado = TOCANDO
+        self._mostrar(status="Tocando")
+        # assim que começar, já garante os anúncios das PRÓXIMAS
+        antecipar_tts()
+        self._marcar_tocado(self._item[0])
+
+    def _marcar_tocado(self, linha):
+        def update_sheet():
+            try:
+                # prioridade alta: passa na frente das leituras de rotina no limitador
+                sheet_pedidos.com_prioridade(planilha.PRIORIDADE_ALTA).update_cell(linha, 6, "Tocado")
+                log.info(f"[GSHEETS] Linha {linha} marcada como 'Tocado'.")
+                cursor_playlist.concluir(linha)
+            except Exception as e:
+                log.error(f"[GSHEETS] ERRO ao atualizar linha {linha}: {e}")
+        self._planilha.submit(update_sheet)
+
+    # ---------- modo sem pausa ----------
+    def _agendar(self):
+        prazos = [self._emenda_em]
+        if self._fade:
+            prazos.append(time.time() + PASSO_CROSSFADE)
+        prazos = [p for p in prazos if p]
+        self._prazo = min(prazos) if prazos else None
+
+    def _agendar_emenda(self, pos=None):
+        """Marca quando a próxima faixa deve começar, pelo tempo que falta da atual."""
+        self._emenda_em = None
+        if EMENDAR_FAIXAS and self._midia and self._item and not is_paused:
+            restante = self._vlc.restante(pos)
+            if restante is not None:
+                antecedencia = max(ANTECEDENCIA_EMENDA, CROSSFADE if self.estado == TOCANDO else 0)
+                self._emenda_em = time.time() + max(0.0, restante - antecedencia)
+        self._agendar()
+
+    def _preparar_proxima(self):
+        """Deixa no player livre a faixa que vem depois da atual: a música do anúncio ou o anúncio da próxima."""
+        if not EMENDAR_FAIXAS or not self._item:
+            return
+        if self.estado == ANUNCIANDO:
+            arquivo = self._item[3]
+        else:
+            with lock_geral:
+                proxima = playlist[0] if playlist else None
+            if not proxima:
+                return
+            arquivo = proxima[3]
+            texto = texto_anuncio(proxima)
+            if texto:
+                fut = servico_tts.pedir(texto, "antecipado")
+                if not fut.done() or fut.cancelled() or fut.exception():
+                    return  # anúncio ainda não existe: a troca carrega na hora
+                arquivo = fut.result()
+        if os.path.exists(arquivo):
+            self._vlc.preparar(arquivo)
+
+    def _emendar_proxima(self):
+        """Perto do fim da faixa: a próxima já começa no outro player, emendada na atual."""
+        if self.estado == ANUNCIANDO:
+            self._largar_midia()
+            return self._tocar_musica()
+        log.info(f"[PLAYER] Música '{current_title}' finalizando: emendando a próxima.")
+        self._crossfade = CROSSFADE
+        self._terminar(emendar=True)
+
+    def _passo_crossfade(self):
+        inicio, duracao = self._fade
+        fracao = (time.time() - inicio) / duracao
+        self._vlc.misturar(fracao)
+        if fracao >= 1:
+            self._fade = None
+            self._preparar_proxima()
+
+    def resumo_emendas(self):
+        """Intervalos entre faixas para o monitor."""
+        if self._vlc is None:
+            return "-"
+        est = self._vlc.estatisticas()
+        return (f"{est['emendas']} emendas, intervalo méd {est['medio_ms']:.0f} / máx {est['maximo_ms']:.0f} ms, "
+                f"{est['aproveitadas']} pré-carregadas")
+
+    def _terminar(self, emendar=False):
+        global is_paused
+        if emendar:
+            self._largar_midia()
+        else:
+            self._parar_midia()
+        is_paused = False  # sem mídia não há o que despausar
+        self.estado = TERMINOU
+        self._item = None
+        self._cmd_tocar()
+
+    # ---------- comandos ----------
+    def _cmd_tocar(self):
+        global current_line, current_video_id, current_title
+        global tts_fim_horario_file, ultimo_horario_fim, avisou_fim
+        if self.estado not in (OCIOSO, TERMINOU):
+            return
 
-    with lock_tts:
-        tts_para_tocar_agora = proximo_tts_file
-        proximo_tts_file = None
+        # Atualiza cache de horários se estiver próximo do intervalo para garantir decisão correta
+        if time.time() - ultima_atualizacao > INTERVALO_ATUALIZACAO:
+            atualizar_horarios()
 
-    if not proxima_musica:
-        musica_rodando = False
-        if tts_para_tocar_agora:
+        if not pode_tocar():
+            # Se tem TTS final pré-gerado e ainda não avisou, toca o aviso de desligamento
             with lock_tts:
-                proximo_tts_file = tts_para_tocar_agora
-        root.after(5000, tocar_proxima_musica)
-        return
-
-    current_line, current_video_id, current_title, arquivo, nome_usuario, mensagem, status_msg = proxima_musica
-    log.info(f"[PLAYER] Preparando para tocar '{current_title}' (linha {current_line}, id={current_video_id}).")
-    try:
-        root.after(0, lambda: titulo_label.config(text=f"Tocando: {current_title}"))
-        root.after(0, lambda: status_label.config(text="Iniciando..."))
-    except Exception:
-        pass
+                ttf = tts_fim_horario_file
+                tocar_aviso = bool(ttf and not avisou_fim and os.path.exists(ttf))
+                if ttf and not avisou_fim:
+                    avisou_fim = True
+                    tts_fim_horario_file = None
+            if tocar_aviso:
+                log.info("[PLAYER] Tocando TTS final (desligamento).")
+                self._abrir(ttf)
+                self.estado = ANUNCIANDO
+                return
+            log.info("[PLAYER] Fora do horário. Aguardando 60s...")
+            return self._ocioso(60)
+
+        with lock_geral:
+            item = playlist.pop(0) if playlist else None
+        download_queue.acordar()  # a fila andou: o próximo prefetch pode entrar no prazo
+        if not item:
+            return self._ocioso(5)  # música nova chama acordar(); o prazo só reconfere o horário
+
+        self._item = item
+        current_line, current_video_id, current_title = item[0], item[1], item[2]
+        log.info(f"[PLAYER] Preparando para tocar '{current_title}' (linha {current_line}, id={current_video_id}).")
+        self._mostrar(titulo=f"Tocando: {current_title}", status="Iniciando...")
+
+        # Se estamos dentro de um horário ativo, prepara o TTS de fim de horário em background
+        if horarios_cache:
+            tz = pytz.timezone("America/Sao_Paulo")
+            agora = datetime.now(tz).time()
+            for inicio, fim in horarios_cache:
+                if (inicio <= fim and inicio <= agora <= fim) or (inicio > fim and (agora >= inicio or agora <= fim)):
+                    ultimo_horario_fim = fim
+                    preparar_tts_fim_horario(fim)
+                    break
 
-    # Se estamos dentro de um horário ativo, prepara TTS de fim de horário em background
-    if horarios_cache:
-        tz = pytz.timezone("America/Sao_Paulo")
-        agora = datetime.now(tz).time()
-        found_fim = None
-        for inicio, fim in horarios_cache:
-            if (inicio <= fim and inicio <= agora <= fim) or (inicio > fim and (agora >= inicio or agora <= fim)):
-                found_fim = fim
-                break
-        if found_fim:
-            ultimo_horario_fim = found_fim
-            with lock_tts:
-                need_prep = (tts_fim_horario_file is None)
-            if need_prep:
-                threading.Thread(target=preparar_tts_fim_horario, args=(found_fim,), daemon=True, name="PrepTTSFIM").start()
+        self._anunciar()
 
-    def rodar():
-        global player
+    def _cmd_anuncio_pronto(self, geracao, fut):
+        if geracao != self._geracao or self.estado != ANUNCIANDO or self._midia:
+            return  # pulada ou já desistiu de esperar
+        self._prazo = None
+        self._soltar_tts()
         try:
-            # 1) Toca TTS se existir
-            if tts_para_tocar_agora and os.path.exists(tts_para_tocar_agora):
-                log.info("[PLAYER] Tocando anúncio pré-gerado (TTS).")
-                tts_player = vlc.MediaPlayer(tts_para_tocar_agora)
-                tts_player.play()
-                time.sleep(0.5)
-                while tts_player.get_state() not in [vlc.State.Ended, vlc.State.Stopped, vlc.State.Error]:
-                    time.sleep(0.2)
-                tts_player.stop()
-                try:
-                    os.remove(tts_para_tocar_agora)
-                except OSError as e:
-                    log.warning(f"[PLAYER] Não foi possível remover TTS: {e}")
-            else:
-                texto_tts = ""
-                if status_msg.lower() == "ler nome e mensagem":
-                    texto_tts = f"O usuário {nome_usuario} disse: {mensagem}. Tocando agora: {current_title}."
-                elif status_msg.lower() == "ler apenas o nome":
-                    texto_tts = f"O usuário {nome_usuario} pediu a música {current_title}."
-                if texto_tts:
-                    log.info("[PLAYER] Gerando anúncio em tempo real (primeira música/sem pré-TTS).")
-                    tts_file = gerar_tts(texto_tts, f"linha{current_line}")
-                    if tts_file:
-                        tts_player = vlc.MediaPlayer(tts_file)
-                        tts_player.play()
-                        time.sleep(0.5)
-                        while tts_player.get_state() not in [vlc.State.Ended, vlc.State.Stopped, vlc.State.Error]:
-                            time.sleep(0.2)
-                        tts_player.stop()
-                        try:
-                            os.remove(tts_file)
-                        except OSError as e:
-                            log.warning(f"[PLAYER] Não foi possível remover TTS: {e}")
-
-            # 2) Toca a música
-            log.info(f"[PLAYER] Tocando arquivo: {arquivo}")
-            player = vlc.MediaPlayer(arquivo)
-            player.play()
-
-            # 3) Assim que começar, já prepara o TTS da PRÓXIMA
-            threading.Thread(target=preparar_proximo_tts, daemon=True, name="PrepProxTTS").start()
-
-            # 4) Atualiza planilha
-            def update_sheet():
-                try:
-                    sheet_pedidos.update_cell(current_line, 6, "Tocado")
-                    log.info(f"[GSHEETS] Linha {current_line} marcada como 'Tocado'.")
-                except Exception as e:
-                    log.error(f"[GSHEETS] ERRO ao atualizar linha {current_line}: {e}")
-            threading.Thread(target=update_sheet, daemon=True, name="UpdSheet").start()
-
-            # 5) Evento fim de mídia
-            em = player.event_manager()
-            def on_end(event):
-                global musica_rodando
-                log.info(f"[PLAYER] Música '{current_title}' finalizada.")
-                musica_rodando = False
-                root.after(100, tocar_proxima_musica)
-            em.event_attach(vlc.EventType.MediaPlayerEndReached, on_end)
-
-        except Exception as e:
-            log.error(f"[PLAYER] ERRO ao tocar música: {e}")
-            globals()['musica_rodando'] = False
-            try:
-                root.after(1000, tocar_proxima_musica)
-            except Exception:
-                pass
+            tts_file = fut.result()
+        except Exception:
+            tts_file = None  # já logado pelo servico_tts
+        if not tts_file or not os.path.exists(tts_file):
+            return self._tocar_musica()
+        espera = time.time() - self._t_tts
+        if espera < 0.05:
+            log.info("[PLAYER] Tocando anúncio pré-gerado (TTS).")
+        else:
+            log.info(f"[PLAYER] Anúncio não estava pronto: esperou {espera:.1f}s pela síntese.")
+        self._abrir(tts_file)
+
+    def _cmd_prazo(self):
+        if self.estado == OCIOSO:
+            self._cmd_tocar()
+        elif self.estado == ANUNCIANDO and not self._midia:
+            log.warning(f"[TTS] Anúncio (linha{current_line}) não ficou pronto em {TIMEOUT_TTS}s.")
+            self._parar_midia()
+            self._tocar_musica()
+        elif self._midia:
+            if self._fade:
+                self._passo_crossfade()
+            if self._emenda_em and time.time() >= self._emenda_em:
+                return self._emendar_proxima()
+            self._agendar()
+
+    def _cmd_tocando(self, geracao):
+        """A faixa atual começou (ou voltou da pausa): agenda a emenda e carrega a seguinte."""
+        if geracao != self._geracao:
+            return
+        self._agendar_emenda()
+        if not self._fade:
+            self._preparar_proxima()
+
+    def _cmd_fim(self, geracao):
+        if geracao != self._geracao:
+            if self._midia and not self._fade:
+                self._preparar_proxima()  # a faixa anterior acabou de sair: o player dela ficou livre
+            return
+        if self.estado == ANUNCIANDO:
+            if self._item is None:  # aviso de fim de horário
+                self._parar_midia()
+                return self._ocioso(60)
+            self._largar_midia()
+            return self._tocar_musica()
+        if self.estado == TOCANDO:
+            log.info(f"[PLAYER] Música '{current_title}' finalizada.")
+            self._terminar(emendar=True)
+
+    def _cmd_erro(self, geracao):
+        if geracao != self._geracao:
+            return
+        log.error(f"[PLAYER] ERRO do VLC ao tocar ({self.estado}) '{current_title}'.")
+        self._cmd_fim(geracao)
 
-    threading.Thread(target=rodar, daemon=True, name="PlayThread").start()
+    def _cmd_pausar(self):
+        global is_paused
+        if not self._midia:
+            return
+        is_paused = not is_paused
+        if self._fade:
+            self._fade = None
+            self._vlc.misturar(1.0)
+        self._vlc.pausar(is_paused)
+        if is_paused:
+            self._emenda_em = None  # volta a ser agendada no evento de "tocando" da retomada
+            self._agendar()
+        self._mostrar(status="Pausado" if is_paused else "Tocando")
+
+    def _cmd_proxima(self):
+        log.info("[PLAYER] Comando manual: Próxima música.")
+        if self.estado == ANUNCIANDO and self._item:
+            self._marcar_tocado(self._item[0])  # o pedido sai da playlist mesmo pulado no anúncio
+        self._terminar()
+
+    def _cmd_posicionar(self, pos):
+        if self.estado == TOCANDO:
+            self._vlc.posicionar(pos)
+            self._agendar_emenda(pos)
+
+motor = MotorReproducao()
 
 # ===========================
 # CONTROLES GUI
 # ===========================
 def toggle_play_pause():
-    global player, is_paused
-    if not player:
-        return
-    if player.is_playing():
-        player.pause()
-        is_paused = True
-        status_label.config(text="Pausado")
-    else:
-        player.play()
-        is_paused = False
-        status_label.config(text="Tocando")
+    motor.enviar("pausar")
 
 def proxima_musica_manual():
-    global player, musica_rodando, is_paused, proximo_tts_file
-    log.info("[PLAYER] Comando manual: Próxima música.")
-    if player:
-        player.stop()
-
-    # Limpa TTS pré-gerado ao pular
-    with lock_tts:
-        if proximo_tts_file and os.path.exists(proximo_tts_file):
-            try:
-                os.remove(proximo_tts_file)
-                log.info("[PLAYER] TTS pré-gerado removido devido ao skip.")
-            except OSError:
-                pass
-        proximo_tts_file = None
-
-    musica_rodando = False
-    is_paused = False
-    root.after(100, tocar_proxima_musica)
+    motor.enviar("proxima")
 
 def iniciar_arrasto(event):
     globals()['arrastando_barra'] = True
 
 def finalizar_arrasto(event):
-    global arrastando_barra, player
+    global arrastando_barra
     arrastando_barra = False
-    if player and player.is_seekable():
-        pos = barra_progresso.get()
-        player.set_position(pos / 100.0)
+    motor.enviar("posicionar", barra_progresso.get() / 100.0)
 
 def atualizar_barra_progresso():
     try:
@@ -698,60 +1724,65 @@ def atualizar_barra_progresso():
 # ===========================
 # GUI
 # ===========================
-root = tk.Tk()
-root.title("Rádio Player Py")
-root.geometry("450x300")
-root.minsize(450, 300)
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("Rádio Player Py")
+    root.geometry("450x300")
+    root.minsize(450, 300)
 
-style = ttk.Style(root)
-style.theme_use('clam')
+    style = ttk.Style(root)
+    style.theme_use('clam')
 
-main_frame = tk.Frame(root, padx=10, pady=10)
-main_frame.pack(expand=True, fill="both")
+    main_frame = tk.Frame(root, padx=10, pady=10)
+    main_frame.pack(expand=True, fill="both")
 
-titulo_label = tk.Label(main_frame, text="Música: Nenhuma", font=("Helvetica", 12, "bold"), wraplength=400, justify="center")
-titulo_label.pack(pady=(0, 5), fill="x")
+    titulo_label = tk.Label(main_frame, text="Música: Nenhuma", font=("Helvetica", 12, "bold"), wraplength=400, justify="center")
+    titulo_label.pack(pady=(0, 5), fill="x")
 
-status_label = tk.Label(main_frame, text="Iniciando...", wraplength=400, justify="center")
-status_label.pack(pady=5, fill="x")
+    status_label = tk.Label(main_frame, text="Iniciando...", wraplength=400, justify="center")
+    status_label.pack(pady=5, fill="x")
 
-tempo_label = tk.Label(main_frame, text="00:00 / 00:00")
-tempo_label.pack(pady=2)
+    tempo_label = tk.Label(main_frame, text="00:00 / 00:00")
+    tempo_label.pack(pady=2)
 
-barra_progresso = tk.Scale(main_frame, from_=0, to=100, orient='horizontal', showvalue=0)
-barra_progresso.pack(pady=5, fill="x")
-barra_progresso.bind("<ButtonPress-1>", iniciar_arrasto)
-barra_progresso.bind("<ButtonRelease-1>", finalizar_arrasto)
+    barra_progresso = tk.Scale(main_frame, from_=0, to=100, orient='horizontal', showvalue=0)
+    barra_progresso.pack(pady=5, fill="x")
+    barra_progresso.bind("<ButtonPress-1>", iniciar_arrasto)
+    barra_progresso.bind("<ButtonRelease-1>", finalizar_arrasto)
 
-control_frame = tk.Frame(main_frame)
-control_frame.pack(pady=10)
+    control_frame = tk.Frame(main_frame)
+    control_frame.pack(pady=10)
 
-btn_play_pause = tk.Button(control_frame, text="▶ / ⏸", command=toggle_play_pause, width=15, height=2)
-btn_play_pause.pack(side="left", padx=5)
+    btn_play_pause = tk.Button(control_frame, text="▶ / ⏸", command=toggle_play_pause, width=15, height=2)
+    btn_play_pause.pack(side="left", padx=5)
 
-btn_next = tk.Button(control_frame, text="⏭ Próxima", command=proxima_musica_manual, width=15, height=2)
-btn_next.pack(side="left", padx=5)
+    btn_next = tk.Button(control_frame, text="⏭ Próxima", command=proxima_musica_manual, width=15, height=2)
+    btn_next.pack(side="left", padx=5)
 
-linha_label = tk.Label(main_frame, text="Linha atual: 0", anchor="e")
-linha_label.pack(side="bottom", fill="x", padx=5, pady=5)
+    linha_label = tk.Label(main_frame, text="Linha atual: 0", anchor="e")
+    linha_label.pack(side="bottom", fill="x", padx=5, pady=5)
 
-# ===========================
-# INICIALIZAÇÃO
-# ===========================
-log.info("[SYSTEM] Iniciando aplicação da rádio...")
-atualizar_cache_offline()
-atualizar_horarios()
+    # ===========================
+    # INICIALIZAÇÃO
+    # ===========================
+    log.info("[SYSTEM] Iniciando aplicação da rádio...")
+    conectar_planilha()
+    atualizar_cache_offline()
+    gerenciador_cache.iniciar()
+    atualizar_horarios()
 
-# Threads de background
-threading.Thread(target=monitorar_desempenho, daemon=True, name="Monitor").start()
-threading.Thread(target=buscar_novas_musicas_worker, daemon=True, name="SheetsPoll").start()
+    # Threads de background
+    threading.Thread(target=monitorar_desempenho, daemon=True, name="Monitor").start()
+    threading.Thread(target=buscar_novas_musicas_worker, daemon=True, name="SheetsPoll").start()
 
-# *** APENAS 1 WORKER DE DOWNLOAD ***
-threading.Thread(target=download_worker, daemon=True, name="DownloadWorker").start()
-log.info("[SYSTEM] 1 worker de download iniciado (como solicitado).")
+    for i in range(NUM_WORKERS_DOWNLOAD):
+        threading.Thread(target=download_worker, daemon=True, name=f"DownloadWorker-{i + 1}").start()
+    log.info(f"[SYSTEM] {NUM_WORKERS_DOWNLOAD} worker(s) de download iniciado(s).")
+    if PREAQUECIMENTO_ATIVO:
+        threading.Thread(target=preaquecer_cache_worker, daemon=True, name="PreAquecer").start()
 
-root.after(500, atualizar_barra_progresso)
-root.after(2000, tocar_proxima_musica)
-root.after(INTERVALO_CHECK_HORARIOS * 1000, atualizar_horarios)
+    root.after(500, atualizar_barra_progresso)
+    root.after(2000, motor.iniciar)
+    root.after(INTERVALO_CHECK_HORARIOS * 1000, atualizar_horarios)
 
-root.mainloop()
+    root.mainloop()
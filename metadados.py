@@ -0,0 +1,133 @@
+"""
+Metadados de vídeos do YouTube compartilhados entre o back.py (validação) e o main.py (download).
+
+- extrair_video_id(url): descobre o ID direto da URL, sem rede;
+- CacheMetadados: guarda em disco (SQLite) título, duração, age_limit, _type e formatos de áudio
+  por ID, com validade (TTL) e limite de itens (descarta os acessados há mais tempo).
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs
+
+log = logging.getLogger("metadados")
+
+ARQUIVO_CACHE_METADADOS = "metadados_cache.db"
+TTL_METADADOS = 7 * 24 * 3600   # seg
+MAX_METADADOS = 5000            # itens
+
+# ==============================
+# ID DO VÍDEO (sem rede)
+# ==============================
+def extrair_video_id(url: str):
+    """watch?v=<id>, youtu.be/<id>, /shorts/<id>, /live/<id>. Devolve None se não reconhecer."""
+    try:
+        p = urlparse((url or "").strip())
+        host = p.netloc.lower()
+        partes = [x for x in p.path.split("/") if x]
+        if "youtu.be" in host:
+            return partes[0] if partes else None
+        if "youtube.com" not in host:
+            return None
+        if p.path.lower().startswith("/watch"):
+            v = parse_qs(p.query).get("v", [""])[0].strip()
+            return v or None
+        if len(partes) >= 2 and partes[0].lower() in ("shorts", "live"):
+            return partes[1].strip() or None
+        return None
+    except Exception:
+        return None
+
+# ==============================
+# CACHE EM DISCO
+# ==============================
+def resumir_info(info: dict) -> dict:
+    """Só o que interessa do info do yt_dlp (sem URLs de stream, que expiram)."""
+    formatos = []
+    for f in info.get("formats") or []:
+        if f.get("acodec") in (None, "none") or f.get("vcodec") not in (None, "none"):
+            continue  # só áudio
+        formatos.append({
+            "format_id": f.get("format_id"),
+            "ext": f.get("ext"),
+            "acodec": f.get("acodec"),
+            "abr": f.get("abr"),
+            "filesize": f.get("filesize") or f.get("filesize_approx"),
+        })
+    return {
+        "id": info.get("id"),
+        "title": info.get("title"),
+        "duration": info.get("duration"),
+        "age_limit": info.get("age_limit", 0),
+        "_type": info.get("_type", "video"),
+        "formats": formatos,
+    }
+
+class CacheMetadados:
+    def __init__(self, caminho=ARQUIVO_CACHE_METADADOS, ttl=TTL_METADADOS, max_itens=MAX_METADADOS):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.max_itens = max_itens
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with self._conectar() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS videos ("
+                " video_id TEXT PRIMARY KEY, dados TEXT NOT NULL,"
+                " salvo_em REAL NOT NULL, acessado_em REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _conectar(self):
+        # 1 conexão por operação: seguro entre threads e entre os dois programas
+        con = sqlite3.connect(self.caminho, timeout=10)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def obter(self, video_id):
+        """Devolve o resumo salvo (dict) ou None se não existir / estiver vencido."""
+        if not video_id:
+            return None
+        try:
+            agora = time.time()
+            with self._conectar() as con:
+                row = con.execute("SELECT dados, salvo_em FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+                if not row:
+                    return None
+                if agora - row[1] > self.ttl:
+                    con.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+                    return None
+                con.execute("UPDATE videos SET acessado_em = ? WHERE video_id = ?", (agora, video_id))
+            return json.loads(row[0])
+        except Exception as e:
+            log.warning(f"[METADADOS] Erro ao ler cache ({video_id}): {e}")
+            return None
+
+    def salvar(self, video_id, info):
+        """Salva o resumo do info do yt_dlp e descarta os itens menos acessados acima do limite."""
+        if not video_id or not info:
+            return None
+        resumo = resumir_info(info)
+        try:
+            agora = time.time()
+            with self._conectar() as con:
+                con.execute(
+                    "INSERT OR REPLACE INTO videos (video_id, dados, salvo_em, acessado_em) VALUES (?, ?, ?, ?)",
+                    (video_id, json.dumps(resumo, ensure_ascii=False), agora, agora),
+                )
+                excesso = con.execute("SELECT COUNT(*) FROM videos").fetchone()[0] - self.max_itens
+                if excesso > 0:
+                    con.execute(
+                        "DELETE FROM videos WHERE video_id IN "
+                        "(SELECT video_id FROM videos ORDER BY acessado_em ASC LIMIT ?)", (excesso,)
+                    )
+        except Exception as e:
+            log.warning(f"[METADADOS] Erro ao salvar cache ({video_id}): {e}")
+        return resumo
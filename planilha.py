@@ -0,0 +1,318 @@
+"""
+Acesso compartilhado ao Google Sheets (usado pelo main.py e pelo back.py).
+
+- A planilha é aberta UMA vez por processo (open_by_key faz um fetch completo de metadados).
+- As abas ficam num registro que guarda id / nº de linhas / nº de colunas
+  e só recarrega esses metadados quando expiram ou são invalidados.
+- Toda chamada à API passa por um limitador único do processo (token bucket com prioridade)
+  e é repetida com backoff exponencial + jitter em 429/5xx; escritas que não podem ser repetidas
+  (append, delete, batch_update estrutural) só em 429, quando a API garante que nada foi gravado.
+"""
+import time
+import heapq
+import random
+import hashlib
+import logging
+import itertools
+import threading
+
+import gspread
+import requests
+from gspread.exceptions import APIError
+from oauth2client.service_account import ServiceAccountCredentials
+
+log = logging.getLogger("planilha")
+
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+INTERVALO_METADADOS = 300  # seg (validade do cache de metadados das abas)
+INTERVALO_ALTERACAO = 5    # seg (threads que perguntam juntas dividem a mesma consulta ao Drive)
+
+# Limitador (por processo; main.py e back.py usam a mesma conta de serviço, então cada um fica com uma parte da cota)
+LIMITE_POR_MINUTO = 30
+RAJADA = 10
+MAX_TENTATIVAS = 6
+BACKOFF_BASE = 1.0    # seg
+BACKOFF_MAX = 64.0    # seg
+STATUS_REPETIR = (429, 500, 502, 503, 504)
+STATUS_LIMITE = 429   # a chamada foi recusada antes de executar: pode repetir até escrita
+# Escritas que duplicam (ou apagam outra linha) se forem repetidas depois de gravadas no servidor
+NAO_IDEMPOTENTES = frozenset({"append_row", "append_rows", "insert_row", "insert_rows",
+                              "delete_rows", "batch_update"})
+
+# Prioridades: menor número = atendido antes
+PRIORIDADE_ALTA = 0      # status do player (ex.: marcar 'Tocado')
+PRIORIDADE_NORMAL = 1
+PRIORIDADE_BAIXA = 2     # leituras de rotina (polling / manutenção)
+
+_lock = threading.Lock()
+_clientes = {}    # creds_file -> gspread.Client
+_registros = {}   # sheet_id -> RegistroAbas
+
+# ==============================
+# LIMITE DE TAXA / REPETIÇÃO
+# ==============================
+class LimitadorTaxa:
+    """
+    Token bucket compartilhado por todas as threads do processo.
+    Quem está esperando com prioridade menor (número) pega a próxima ficha primeiro.
+    """
+    def __init__(self, por_minuto=LIMITE_POR_MINUTO, rajada=RAJADA):
+        self.taxa = por_minuto / 60.0
+        self.rajada = rajada
+        self._fichas = float(rajada)
+        self._reposto_em = time.monotonic()
+        self._fila = []                      # heap de (prioridade, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.contadores = {"chamadas": 0, "limitadas": 0, "repetidas": 0, "falhas": 0}
+
+    def _repor(self):
+        agora = time.monotonic()
+        self._fichas = min(self.rajada, self._fichas + (agora - self._reposto_em) * self.taxa)
+        self._reposto_em = agora
+
+    def adquirir(self, prioridade=PRIORIDADE_NORMAL):
+        with self._cond:
+            senha = (prioridade, next(self._seq))
+            heapq.heappush(self._fila, senha)
+            esperou = False
+            while True:
+                self._repor()
+                if self._fila[0] == senha and self._fichas >= 1:
+                    heapq.heappop(self._fila)
+                    self._fichas -= 1
+                    self.contadores["chamadas"] += 1
+                    if esperou:
+                        self.contadores["limitadas"] += 1
+                    self._cond.notify_all()  # o próximo da fila reavalia
+                    return
+                esperou = True
+                espera = (1 - self._fichas) / self.taxa if self._fila[0] == senha else None
+                self._cond.wait(timeout=espera)
+
+    def contar(self, chave):
+        with self._cond:
+            self.contadores[chave] += 1
+
+    def estatisticas(self):
+        with self._cond:
+            return dict(self.contadores)
+
+limitador = LimitadorTaxa()
+
+def _status_http(e):
+    resp = getattr(e, "response", None)
+    return getattr(resp, "status_code", None)
+
+def executar(func, *args, prioridade=PRIORIDADE_NORMAL, idempotente=None, **kwargs):
+    """
+    Chama func(*args, **kwargs) respeitando o limitador; repete 429/5xx/erros de rede com backoff + jitter.
+    Chamadas não idempotentes (idempotente=None: decide pelo nome, ver NAO_IDEMPOTENTES) só são
+    repetidas em 429: num 5xx ou erro de rede a escrita pode ter sido gravada e a repetição a duplicaria.
+    """
+    if idempotente is None:
+        idempotente = getattr(func, "__name__", "") not in NAO_IDEMPOTENTES
+    repetir = STATUS_REPETIR if idempotente else (STATUS_LIMITE,)
+    for tentativa in range(1, MAX_TENTATIVAS + 1):
+        limitador.adquirir(prioridade)
+        try:
+            return func(*args, **kwargs)
+        except (APIError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            status = _status_http(e) if isinstance(e, APIError) else None
+            if (status not in repetir and (isinstance(e, APIError) or not idempotente)) or tentativa == MAX_TENTATIVAS:
+                limitador.contar("falhas")
+                raise
+            espera = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (tentativa - 1)))
+            limitador.contar("repetidas")
+            log.warning(f"[GSHEETS] {getattr(func, '__name__', 'chamada')} falhou ({status or e}). "
+                        f"Tentativa {tentativa}/{MAX_TENTATIVAS}, repetindo em {espera:.1f}s.")
+            time.sleep(espera)
+
+def estatisticas():
+    """Contadores do limitador: chamadas, limitadas (tiveram que esperar), repetidas e falhas."""
+    return limitador.estatisticas()
+
+class _Limitado:
+    """Proxy: métodos do objeto original passam por executar() com a prioridade da visão."""
+    def __init__(self, alvo, prioridade=PRIORIDADE_NORMAL):
+        self._alvo = alvo
+        self._prioridade = prioridade
+
+    def com_prioridade(self, prioridade):
+        """Mesma aba/planilha, com outra prioridade nas chamadas."""
+        return type(self)(self._alvo, prioridade)
+
+    def __getattr__(self, nome):
+        attr = getattr(self._alvo, nome)
+        if not callable(attr) or nome.startswith("_"):
+            return attr
+        prioridade = self._prioridade
+        def chamada(*args, **kwargs):
+            return executar(attr, *args, prioridade=prioridade, **kwargs)
+        chamada.__name__ = nome
+        return chamada
+
+class PlanilhaLimitada(_Limitado):
+    pass
+
+class AbaLimitada(_Limitado):
+    @property
+    def spreadsheet(self):
+        return PlanilhaLimitada(self._alvo.spreadsheet, self._prioridade)
+
+# ==============================
+# CONEXÃO
+# ==============================
+def autenticar(creds_file="creds.json"):
+    """Autentica uma vez por arquivo de credenciais e reaproveita o client."""
+    with _lock:
+        client = _clientes.get(creds_file)
+        if client is None:
+            creds = ServiceAccountCredentials.from_json_keyfile_name(creds_file, SCOPE)
+            client = gspread.authorize(creds)
+            _clientes[creds_file] = client
+        return client
+
+def registro_abas(sheet_id, creds_file="creds.json"):
+    """Devolve o registro de abas da planilha, abrindo-a apenas na primeira chamada."""
+    with _lock:
+        reg = _registros.get(sheet_id)
+    if reg is not None:
+        return reg
+    client = autenticar(creds_file)
+    with _lock:
+        reg = _registros.get(sheet_id)
+        if reg is None:
+            reg = RegistroAbas(executar(client.open_by_key, sheet_id))
+            _registros[sheet_id] = reg
+            log.info(f"[GSHEETS] Planilha aberta ({sheet_id}).")
+        return reg
+
+def registrar_cliente(client, creds_file="creds.json"):
+    """
+    Registra um client já pronto para o arquivo de credenciais
+    (ex.: o client em memória dos benchmarks), sem passar pela autenticação.
+    """
+    with _lock:
+        _clientes[creds_file] = client
+
+# ==============================
+# REGISTRO DE ABAS
+# ==============================
+class RegistroAbas:
+    """
+    Cache das abas de uma planilha.
+    - aba(titulo): Worksheet (com limitador; os objetos são sempre os mesmos durante a vida do processo);
+    - metadados(titulo): {'id', 'linhas', 'colunas'}, recarregados de forma preguiçosa.
+    """
+    def __init__(self, planilha, ttl=INTERVALO_METADADOS):
+        self.planilha = PlanilhaLimitada(planilha)
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._abas = {}       # titulo -> Worksheet
+        self._meta = {}       # titulo -> {'id', 'linhas', 'colunas'}
+        self._carregado_em = 0.0
+        self._ultima_alteracao = None
+        self._alteracao_lida_em = 0.0
+
+    def _carregar_abas(self):
+        # worksheets() = 1 fetch de metadados para todas as abas
+        for ws in self.planilha.worksheets():
+            self._abas.setdefault(ws.title, AbaLimitada(ws))
+            self._meta[ws.title] = {"id": ws.id, "linhas": ws.row_count, "colunas": ws.col_count}
+        self._carregado_em = time.time()
+
+    def _atualizar_metadados(self):
+        meta = self.planilha.fetch_sheet_metadata()
+        for sheet in meta.get("sheets", []):
+            props = sheet.get("properties", {})
+            grid = props.get("gridProperties", {})
+            self._meta[props.get("title")] = {
+                "id": props.get("sheetId"),
+                "linhas": grid.get("rowCount", 0),
+                "colunas": grid.get("columnCount", 0),
+            }
+        self._carregado_em = time.time()
+
+    def aba(self, titulo):
+        with self._lock:
+            if titulo not in self._abas:
+                self._carregar_abas()
+            if titulo not in self._abas:
+                raise gspread.exceptions.WorksheetNotFound(titulo)
+            return self._abas[titulo]
+
+    def metadados(self, titulo):
+        with self._lock:
+            if not self._carregado_em or time.time() - self._carregado_em > self.ttl:
+                self._atualizar_metadados()
+            return dict(self._meta.get(titulo) or {})
+
+    def invalidar(self):
+        """Força recarregar os metadados (e a última alteração) na próxima consulta (ex.: após inserir/apagar linhas)."""
+        with self._lock:
+            self._carregado_em = 0.0
+            self._alteracao_lida_em = 0.0
+
+    def ultima_alteracao(self):
+        """
+        modifiedTime da planilha (Drive API): 1 chamada barata que vale para todas as abas.
+        Reaproveitado por INTERVALO_ALTERACAO seg. None se não der para consultar.
+        """
+        with self._lock:
+            if time.time() - self._alteracao_lida_em < INTERVALO_ALTERACAO:
+                return self._ultima_alteracao
+            try:
+                planilha = self.planilha.com_prioridade(PRIORIDADE_BAIXA)
+                consultar = getattr(planilha, "get_lastUpdateTime", None)
+                valor = consultar() if consultar else planilha.lastUpdateTime
+            except Exception as e:
+                log.warning(f"[GSHEETS] Não foi possível consultar a última alteração: {e}")
+                valor = None
+            self._ultima_alteracao = valor
+            self._alteracao_lida_em = time.time()
+            return valor
+
+# ==============================
+# SNAPSHOT / DIFF
+# ==============================
+def _hash_linha(row):
+    return hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=8).digest()
+
+class SnapshotAba:
+    """
+    Último estado lido de uma aba, para pular ciclos sem mudança:
+    - se a planilha não foi alterada desde a última leitura, nem baixa a aba;
+    - se baixou, compara o hash de cada linha com a leitura anterior.
+    Depois de atualizar(): 'linhas' = conteúdo atual, 'linhas_alteradas' = nº (1-based) das linhas novas/alteradas.
+    """
+    def __init__(self, registro, titulo):
+        self.registro = registro
+        self.titulo = titulo
+        self.linhas = []
+        self.linhas_alteradas = []
+        self._hashes = None
+        self._alteracao = None
+
+    def atualizar(self, forcar=False):
+        """Relê a aba se preciso. Devolve True se o conteúdo mudou desde a última leitura."""
+        alteracao = self.registro.ultima_alteracao()
+        if not forcar and self._hashes is not None and alteracao is not None and alteracao == self._alteracao:
+            return False
+
+        rows = self.registro.aba(self.titulo).com_prioridade(PRIORIDADE_BAIXA).get_all_values()
+        hashes = [_hash_linha(r) for r in rows]
+        self._alteracao = alteracao
+        if not forcar and hashes == self._hashes:
+            return False
+
+        antigos = self._hashes or []
+        self.linhas_alteradas = [i for i, h in enumerate(hashes, start=1) if i > len(antigos) or antigos[i-1] != h]
+        self.linhas = rows
+        self._hashes = hashes
+        return True
+
+    def invalidar(self):
+        """Força a próxima atualizar() a reler e reprocessar (ex.: o processamento falhou)."""
+        self._hashes = None
+        self._alteracao = None
@@ -0,0 +1,203 @@
+"""
+Reprodução de áudio com um único vlc.Instance para o processo todo.
+
+- dois MediaPlayers reaproveitados, alternados a cada faixa (anúncios e músicas), no lugar de um
+  vlc.MediaPlayer(arquivo) novo por faixa (cada um criava uma instância libvlc implícita
+  e nunca era liberado);
+- os eventos são ligados uma vez só, em cada player; a mídia anterior é liberada (release) na troca;
+- emenda sem pausa (gapless): a próxima faixa já fica carregada e analisada no player livre
+  (preparar) e começa enquanto a atual ainda termina (abrir(..., emendar=True)), com crossfade opcional;
+- mede o intervalo entre o fim de uma faixa e o início da seguinte em cada emenda;
+- contadores de mídias abertas/liberadas para conferir vazamentos (ver bench/bench_soak.py).
+"""
+import time
+import logging
+import threading
+from collections import deque
+
+import vlc
+
+log = logging.getLogger("reprodutor")
+
+OPCOES_VLC = ("--no-video", "--quiet")
+HISTORICO_EMENDAS = 200   # intervalos guardados para as estatísticas
+
+class Reprodutor:
+    def __init__(self, ao_evento, opcoes=OPCOES_VLC):
+        """
+        ao_evento(nome, geracao) recebe "tocando", "fim" e "erro" da faixa atual. Roda na thread
+        do libvlc: só deve enfileirar, nunca chamar o player.
+        """
+        self._instancia = vlc.Instance(*opcoes)
+        self._players = [self._instancia.media_player_new() for _ in range(2)]
+        self._media = [None, None]
+        self._preparado = [None, None]   # arquivo já carregado (e ainda não tocado) em cada player
+        self._geracoes = [0, 0]          # geração da faixa que cada player está tocando
+        self._atual = 0
+        self.geracao = 0  # muda a cada troca/parada: quem recebe o evento descarta os atrasados
+        self.contadores = {"abertas": 0, "liberadas": 0, "preparadas": 0, "aproveitadas": 0}
+
+        # medição das emendas (tempos em perf_counter, escritos pelas threads do libvlc)
+        self._lock = threading.Lock()
+        self._t_fim = [None, None]
+        self._t_inicio = [None, None]
+        self._medindo = None             # (player que sai, player que entra)
+        self.intervalos = deque(maxlen=HISTORICO_EMENDAS)   # ms; negativo = as faixas se sobrepuseram
+
+        for i, p in enumerate(self._players):
+            em = p.event_manager()
+            em.event_attach(vlc.EventType.MediaPlayerPlaying, lambda ev, i=i: self._evento(ao_evento, "tocando", i))
+            em.event_attach(vlc.EventType.MediaPlayerEndReached, lambda ev, i=i: self._evento(ao_evento, "fim", i))
+            em.event_attach(vlc.EventType.MediaPlayerEncounteredError,
+                            lambda ev, i=i: ao_evento("erro", self._geracoes[i]))
+
+    @property
+    def player(self):
+        return self._players[self._atual]
+
+    def _evento(self, ao_evento, nome, i):
+        agora = time.perf_counter()
+        with self._lock:
+            if nome == "tocando" and self._t_inicio[i] is None:
+                self._t_inicio[i] = agora
+            elif nome == "fim":
+                self._t_fim[i] = agora
+            self._medir()
+        ao_evento(nome, self._geracoes[i])
+
+    def _medir(self):
+        if not self._medindo:
+            return
+        saiu, entrou = self._medindo
+        if self._t_fim[saiu] is None or self._t_inicio[entrou] is None:
+            return
+        intervalo = (self._t_inicio[entrou] - self._t_fim[saiu]) * 1000
+        self._medindo = None
+        self.intervalos.append(intervalo)
+        if intervalo > 0:
+            log.info(f"[PLAYER] Intervalo entre faixas: {intervalo:.0f} ms.")
+        else:
+            log.info(f"[PLAYER] Emenda sem intervalo ({-intervalo:.0f} ms de sobreposição).")
+
+    # ---------- carga das mídias ----------
+    def _liberar(self, i):
+        if self._media[i] is None:
+            return
+        with self._lock:
+            if self._medindo and self._medindo[0] == i and self._t_fim[i] is None:
+                self._t_fim[i] = time.perf_counter()  # cortada antes do fim (crossfade maior que a faixa seguinte)
+                self._medir()
+        try:
+            self._players[i].stop()
+        except Exception as e:
+            log.warning(f"[PLAYER] Erro ao parar o VLC: {e}")
+        self._media[i].release()
+        self._media[i] = None
+        self._preparado[i] = None
+        self.contadores["liberadas"] += 1
+
+    def _carregar(self, i, arquivo):
+        self._liberar(i)
+        media = self._instancia.media_new(arquivo)
+        media.parse_with_options(vlc.MediaParseFlag.local, 0)  # assíncrono: duração e cabeçalhos já prontos
+        self._players[i].set_media(media)  # o player guarda a própria referência
+        self._media[i] = media
+        self.contadores["abertas"] += 1
+
+    def preparar(self, arquivo):
+        """Carrega a próxima faixa no player livre (se ele não estiver terminando uma faixa)."""
+        livre = 1 - self._atual
+        if self._preparado[livre] == arquivo:
+            return True
+        if self._media[livre] is not None and self._players[livre].is_playing():
+            return False  # ainda tocando o fim da faixa anterior (crossfade)
+        self._carregar(livre, arquivo)
+        self._preparado[livre] = arquivo
+        self.contadores["preparadas"] += 1
+        return True
+
+    # ---------- troca de faixa ----------
+    def abrir(self, arquivo, emendar=False, volume=100):
+        """
+        Começa a tocar 'arquivo' no player livre. Devolve a geração da nova faixa.
+        emendar=True: a faixa atual não é parada (termina sozinha) e o intervalo entre as duas é medido.
+        """
+        saiu, entrou = self._atual, 1 - self._atual
+        if not emendar:
+            self._liberar(saiu)
+        if self._preparado[entrou] == arquivo:
+            self.contadores["aproveitadas"] += 1
+        else:
+            self._carregar(entrou, arquivo)
+        self._preparado[entrou] = None
+        self.geracao += 1
+        self._geracoes[entrou] = self.geracao
+        self._atual = entrou
+        with self._lock:
+            self._t_fim[entrou] = self._t_inicio[entrou] = None
+            self._medindo = (saiu, entrou) if emendar and self._media[saiu] is not None else None
+        self._players[entrou].audio_set_volume(volume)
+        self._players[entrou].play()
+        return self.geracao
+
+    def soltar(self):
+        """A faixa atual segue até o fim, mas os eventos dela deixam de valer (a próxima vem emendada)."""
+        self.geracao += 1
+
+    def parar(self):
+        self.geracao += 1
+        with self._lock:
+            self._medindo = None
+        for i in range(2):
+            if self._preparado[i] is None:
+                self._liberar(i)
+
+    def misturar(self, fracao):
+        """Crossfade: a faixa atual em 'fracao' do volume e a anterior (ainda terminando) no resto."""
+        fracao = min(1.0, max(0.0, fracao))
+        self._players[self._atual].audio_set_volume(int(100 * fracao))
+        anterior = 1 - self._atual
+        if self._media[anterior] is not None and self._preparado[anterior] is None:
+            self._players[anterior].audio_set_volume(int(100 * (1 - fracao)))
+
+    def restante(self, pos=None):
+        """Segundos até o fim da faixa atual (pos: posição 0..1 recém-pedida). None se a duração é desconhecida."""
+        p, media = self._players[self._atual], self._media[self._atual]
+        total = p.get_length()
+        if total <= 0 and media is not None:
+            total = media.get_duration()
+        if total <= 0:
+            return None
+        atual = total * pos if pos is not None else max(p.get_time(), 0)
+        return max(0, total - atual) / 1000.0
+
+    def pausar(self, pausado):
+        if self._media[self._atual] is None:
+            return
+        anterior = 1 - self._atual
+        if pausado and self._media[anterior] is not None and self._preparado[anterior] is None:
+            self._liberar(anterior)  # corta o fim da faixa anterior junto
+        self.player.set_pause(1 if pausado else 0)
+
+    def posicionar(self, pos):
+        if self._media[self._atual] is not None and self.player.is_seekable():
+            self.player.set_position(pos)
+
+    def estatisticas(self):
+        with self._lock:
+            intervalos = list(self.intervalos)
+        est = dict(self.contadores)
+        est["emendas"] = len(intervalos)
+        gaps = [max(0.0, i) for i in intervalos]
+        est["ultimo_ms"] = gaps[-1] if gaps else 0.0
+        est["medio_ms"] = sum(gaps) / len(gaps) if gaps else 0.0
+        est["maximo_ms"] = max(gaps) if gaps else 0.0
+        return est
+
+    def fechar(self):
+        """Libera players e instância (fim do processo / benchmark)."""
+        self.parar()
+        for i, p in enumerate(self._players):
+            self._liberar(i)
+            p.release()
+        self._instancia.release()